@@ -324,6 +324,7 @@ function initialMap(callback) {
         micboard.discovered = data.discovered;
         micboard.mp4_list = data.mp4;
         micboard.img_list = data.jpg;
+        micboard.bg_versions = data.bg_versions;
         micboard.localURL = data.url;
         micboard.groups = groupTableBuilder(data);
         micboard.config = data.config;
@@ -5,6 +5,7 @@ import { updateBackground } from './gif.js';
 import { initChart, charts, destroyAllCharts } from './chart-smoothie.js';
 import { seedTransmitters, autoRandom } from './demodata.js';
 import { updateEditor } from './dnd.js';
+import { sendView } from './data.js';
 
 function allSlots() {
   const slot = micboard.config.slots;
@@ -296,6 +297,7 @@ export function renderDisplayList(dl) {
   });
 
   infoToggle();
+  sendView();
 }
 
 export function renderGroup(group) {
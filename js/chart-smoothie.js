@@ -22,6 +22,42 @@ export function setTimeMode(servertimeString) {
   }
 }
 
+// Decode a binary chart-update frame, see encode_chart_frame in py/tornado_server.py
+const CHART_HEADER_SIZE = 11;
+const CHART_ENTRY_SIZE = 9;
+
+export function decodeChartFrame(buffer) {
+  const view = new DataView(buffer);
+  const count = view.getUint16(1, true);
+  const base = view.getFloat64(3, true);
+  const out = [];
+
+  let offset = CHART_HEADER_SIZE;
+  for (let i = 0; i < count; i += 1) {
+    const slot = view.getUint16(offset, true);
+    const kind = view.getUint8(offset + 2);
+    const a = view.getInt16(offset + 3, true);
+    const b = view.getInt16(offset + 5, true);
+    const tx = micboard.transmitters[slot];
+    const data = {
+      slot,
+      type: tx ? tx.type : undefined,
+      timestamp: base + (view.getUint16(offset + 7, true) / 1000),
+    };
+
+    if (kind === 0) {
+      data.audio_level = a;
+      data.rf_level = b;
+    } else {
+      data.audio_level_l = a;
+      data.audio_level_r = b;
+    }
+    out.push(data);
+    offset += CHART_ENTRY_SIZE;
+  }
+  return out;
+}
+
 export function updateChart(data) {
   if (micboard.displayList.includes(data.slot)) {
     let timestamp;
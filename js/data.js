@@ -3,7 +3,7 @@
 import 'whatwg-fetch';
 import { dataURL, ActivateMessageBoard, micboard, updateNavLinks, dataFilterFromList } from './app.js';
 import { renderGroup, updateSlot } from './channelview.js';
-import { updateChart } from './chart-smoothie.js';
+import { updateChart, decodeChartFrame } from './chart-smoothie.js';
 
 
 export function postJSON(url, data, callback) {
@@ -23,29 +23,84 @@ export function postJSON(url, data, callback) {
     .catch(error => console.error('Error:', error));
 }
 
+function applySnapshot(data) {
+  if (micboard.connectionStatus === 'DISCONNECTED') {
+    window.location.reload();
+  }
+  // Update live slots
+  data.receivers.forEach((rx) => {
+    rx.tx.forEach(updateSlot);
+  });
+  // Rebuild transmitters from latest data when not in demo
+  if (micboard.url.demo !== 'true') {
+    micboard.transmitters = [];
+    dataFilterFromList(data);
+  }
+  micboard.connectionStatus = 'CONNECTED';
+  micboard.config = data.config;
+  micboard.bg_versions = data.bg_versions;
+  micboard.sync = { boot: data.boot, seq: data.seq };
+  return data;
+}
+
 export function JsonUpdate() {
   return fetch(dataURL)
+    .then(response => response.json())
+    .then(applySnapshot)
+    .catch((error) => {
+      console.log(error);
+      micboard.connectionStatus = 'DISCONNECTED';
+      throw error;
+    });
+}
+
+function applySlotChange(data) {
+  if (micboard.url.demo !== 'true' && micboard.transmitters[data.slot]) {
+    Object.assign(micboard.transmitters[data.slot], data);
+  }
+  updateSlot(data);
+}
+
+// Fetch only what changed since the last sync; the server answers with a
+// full snapshot when we are too far behind.
+function DeltaUpdate() {
+  if (!micboard.sync) {
+    return JsonUpdate();
+  }
+
+  const url = 'api/changes?since=' + micboard.sync.seq + '&boot=' + micboard.sync.boot;
+  return fetch(url)
     .then(response => response.json())
     .then((data) => {
+      if (data.snapshot) {
+        return applySnapshot(data.snapshot);
+      }
+
       if (micboard.connectionStatus === 'DISCONNECTED') {
         window.location.reload();
       }
-      // Update live slots
-      data.receivers.forEach((rx) => {
-        rx.tx.forEach(updateSlot);
+      micboard.connectionStatus = 'CONNECTED';
+
+      let reload = false;
+      data.changes.forEach((change) => {
+        if (change.type === 'slot') {
+          applySlotChange(change.data);
+        } else if (change.type === 'group') {
+          updateGroup(change.data);
+        } else {
+          reload = true;
+        }
       });
-      // Rebuild transmitters from latest data when not in demo
-      if (micboard.url.demo !== 'true') {
-        micboard.transmitters = [];
-        dataFilterFromList(data);
+      micboard.sync.seq = data.seq;
+
+      // Config and plan changes are rare; pick them up with a full reload
+      if (reload) {
+        return JsonUpdate();
       }
-      micboard.connectionStatus = 'CONNECTED';
-      micboard.config = data.config;
       return data;
     }).catch((error) => {
       console.log(error);
       micboard.connectionStatus = 'DISCONNECTED';
-      throw error;
     });
 }
 
@@ -61,9 +116,17 @@ function updateGroup(data) {
 }
 
 export function initLiveData() {
-  // Prefer websocket updates; reduce polling to a 5s fallback to cut load
+  // Prefer websocket updates; a 5s delta sync catches anything missed
   wsConnect();
-  setInterval(JsonUpdate, 5000);
+  setInterval(DeltaUpdate, 5000);
+}
+
+// Tell the server which slots are on screen so only those meter at full rate
+export function sendView() {
+  const socket = micboard.socket;
+  if (socket && socket.readyState === WebSocket.OPEN && micboard.displayList) {
+    socket.send(JSON.stringify({ view: micboard.displayList.filter(slot => slot !== 0) }));
+  }
 }
 
 function wsConnect() {
@@ -76,11 +139,19 @@ function wsConnect() {
     newUri = 'ws:';
   }
 
-  newUri += '//' + loc.host + loc.pathname + 'ws';
+  // Chart updates arrive as compact binary frames, everything else as JSON
+  newUri += '//' + loc.host + loc.pathname + 'ws?chart=binary&view=1';
 
   micboard.socket = new WebSocket(newUri);
+  micboard.socket.binaryType = 'arraybuffer';
+  micboard.socket.onopen = sendView;
 
   micboard.socket.onmessage = (msg) => {
+    if (msg.data instanceof ArrayBuffer) {
+      decodeChartFrame(msg.data).forEach(updateChart);
+      return;
+    }
+
     const data = JSON.parse(msg.data);
 
     if (data['chart-update']) {
@@ -2,6 +2,14 @@
 
 import { micboard } from './app.js';
 
+function backgroundURL(name) {
+  const version = micboard.bg_versions && micboard.bg_versions[name];
+  if (version) {
+    return 'bg/' + name + '?v=' + version;
+  }
+  return 'bg/' + name;
+}
+
 export function updateBackground(slotSelector) {
   const s = slotSelector;
 
@@ -13,10 +21,10 @@ export function updateBackground(slotSelector) {
   const name = s.getElementsByClassName('name')[0].innerHTML.toLowerCase() + extensions[micboard.backgroundMode];
 
   if (micboard.backgroundMode === 'MP4' && micboard.mp4_list.indexOf(name) > -1) {
-    const style = 'background: url("bg/' + name + '") center; background-size: cover;';
+    const style = 'background: url("' + backgroundURL(name) + '") center; background-size: cover;';
     s.setAttribute('style', style);
   } else if (micboard.backgroundMode === 'IMG' && micboard.img_list.indexOf(name) > -1) {
-    const style = 'background: url("bg/' + name + '") center; background-size: cover;';
+    const style = 'background: url("' + backgroundURL(name) + '") center; background-size: cover;';
     s.setAttribute('style', style);
   } else {
     s.setAttribute('style', "background-image: ''; background-size: ''");
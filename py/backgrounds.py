@@ -0,0 +1,84 @@
+import os
+import time
+import zlib
+import threading
+import logging
+
+import config
+
+
+# Seconds between directory scans; google_drive refreshes right after a sync
+SCAN_INTERVAL = 5
+
+# Files the front end loads as backgrounds; only these get a version in /data.json
+MEDIA_EXTENSIONS = frozenset(['.gif', '.jpg', '.png', '.mp4', '.webm'])
+
+
+class BackgroundIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.path = None
+        self.files = {}
+        self.by_ext = {}
+        self.versions = {}
+        self.version = 0
+
+    def scan(self):
+        with self.lock:
+            path = config.gif_dir
+            files = {}
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            ext = os.path.splitext(entry.name)[1].lower()
+                            files[entry.name] = (ext, stat.st_size, stat.st_mtime_ns)
+            except OSError as e:
+                logging.warning("Background scan failed for %s: %s", path, e)
+
+            if files == self.files and path == self.path:
+                return False
+
+            by_ext = {}
+            versions = {}
+            for name in sorted(files):
+                by_ext.setdefault(files[name][0], []).append(name)
+                if files[name][0] in MEDIA_EXTENSIONS:
+                    versions[name] = file_version(*files[name][1:])
+
+            self.path = path
+            self.files = files
+            self.by_ext = by_ext
+            self.versions = versions
+            self.version += 1
+            return True
+
+    def file_list(self, extension):
+        return self.by_ext.get(extension, [])
+
+    # (extension, size, mtime_ns) or None
+    def get(self, name):
+        return self.files.get(name)
+
+    # Short token that changes whenever the file is replaced, or None
+    def file_version(self, name):
+        return self.versions.get(name)
+
+
+def file_version(size, mtime_ns):
+    return '{:x}-{:08x}'.format(mtime_ns // 1000000, zlib.crc32(b'%d:%d' % (size, mtime_ns)))
+
+
+index = BackgroundIndex()
+
+
+def watch():
+    while True:
+        time.sleep(SCAN_INTERVAL)
+        index.scan()
+
+
+def start_watch_thread():
+    index.scan()
+    threading.Thread(target=watch, daemon=True).start()
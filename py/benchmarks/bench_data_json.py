@@ -0,0 +1,117 @@
+"""/data.json latency with many displays polling at once.
+
+Serves /data.json for a configured rig (receivers, slots, a backgrounds
+folder full of files) and hits it from concurrent pollers that revalidate
+with If-None-Match like a browser does. Device state changes once a second.
+The old handler, which rebuilt and re-encoded everything per request, is
+measured for comparison.
+
+    python benchmarks/bench_data_json.py [--pollers 50] [--seconds 5]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shure
+import config
+import backgrounds
+import tornado_server
+from tornado import web, httpclient
+
+
+class LegacyJsonHandler(web.RequestHandler):
+    def get(self):
+        self.set_header('Content-Type', 'application/json')
+        payload = json.loads(tornado_server.micboard_json(shure.NetworkDevices))
+        payload['plan_of_day'] = []
+        self.write(json.dumps(payload, sort_keys=True, indent=4))
+
+
+def setup(receivers, files):
+    gif_dir = tempfile.mkdtemp()
+    for i in range(files):
+        ext = ['.gif', '.jpg', '.mp4'][i % 3]
+        open(os.path.join(gif_dir, 'person{}{}'.format(i, ext)), 'w').close()
+
+    slots = []
+    for i in range(receivers):
+        for ch in range(1, 5):
+            slots.append({'slot': len(slots) + 1, 'type': 'ulxd', 'ip': '10.0.0.{}'.format(i + 1), 'channel': ch})
+
+    config.config_tree = {'port': 8058, 'slots': slots, 'groups': [], 'micboard_version': 'bench'}
+    config.gif_dir = gif_dir
+    backgrounds.index.scan()
+    for chan in slots:
+        shure.check_add_network_device(chan['ip'], chan['type']).add_channel_device(chan)
+
+
+def serve(port, ready):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    app = web.Application([
+        (r'/data.json', tornado_server.JsonHandler),
+        (r'/legacy.json', LegacyJsonHandler),
+    ])
+    app.listen(port)
+    ready.set()
+    asyncio.get_event_loop().run_forever()
+
+
+async def poller(client, url, deadline, latencies):
+    etag = None
+    while time.perf_counter() < deadline:
+        headers = {'If-None-Match': etag} if etag else {}
+        start = time.perf_counter()
+        response = await client.fetch(url, headers=headers, raise_error=False)
+        latencies.append(time.perf_counter() - start)
+        etag = response.headers.get('Etag', etag)
+
+
+async def state_changes(deadline):
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(1)
+        tornado_server.data_snapshot.invalidate()
+        rx = shure.NetworkDevices[0]
+        rx.channels[0].battery = 5 - rx.channels[0].battery % 5
+
+
+async def run(url, pollers, seconds):
+    client = httpclient.AsyncHTTPClient(max_clients=pollers)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(state_changes(deadline),
+                         *[poller(client, url, deadline, latencies) for _ in range(pollers)])
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pollers', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--receivers', type=int, default=15)
+    parser.add_argument('--backgrounds', type=int, default=3000)
+    parser.add_argument('--port', type=int, default=18058)
+    args = parser.parse_args()
+
+    setup(args.receivers, args.backgrounds)
+    ready = threading.Event()
+    threading.Thread(target=serve, args=(args.port, ready), daemon=True).start()
+    ready.wait()
+
+    print('{:>10} {:>10} {:>10} {:>10}'.format('handler', 'req/s', 'p50 ms', 'p95 ms'))
+    for name in ['legacy.json', 'data.json']:
+        url = 'http://127.0.0.1:{}/{}'.format(args.port, name)
+        latencies = sorted(asyncio.run(run(url, args.pollers, args.seconds)))
+        print('{:>10} {:>10.0f} {:>10.1f} {:>10.1f}'.format(
+            name.split('.')[0], len(latencies) / args.seconds,
+            latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * .95)] * 1000))
+
+
+if __name__ == '__main__':
+    main()
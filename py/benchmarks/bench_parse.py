@@ -0,0 +1,101 @@
+"""Per-line parse cost of ShureNetworkDevice.parse_raw_rx.
+
+Replays REP/SAMPLE traffic as captured from each receiver type through a
+fully configured device and reports the cost per line. Pass --max-ns to
+fail (exit 1) when any receiver type is slower than the given budget.
+
+    python benchmarks/bench_parse.py [--lines 200000] [--max-ns 20000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shure
+import channel
+from networkdevice import ShureNetworkDevice
+
+
+TRAFFIC = {
+    'ulxd': [
+        '< SAMPLE {ch} ALL AX 097 037 >',
+        '< SAMPLE {ch} ALL XB 090 021 >',
+        '< SAMPLE {ch} ALL AX 101 040 >',
+        '< REP {ch} BATT_BARS 004 >',
+        '< REP {ch} CHAN_NAME {{05 Vox 1    }} >',
+        '< REP {ch} TX_OFFSET 012 >',
+        '< REP {ch} BATT_RUN_TIME 00432 >',
+        '< REP {ch} AUDIO_GAIN 030 >',
+    ],
+    'axtd': [
+        '< SAMPLE {ch} ALL 255 000 005 033 AX 00 011 00 012 >',
+        '< SAMPLE {ch} ALL 004 128 010 060 XB 00 050 00 055 >',
+        '< REP {ch} TX_BATT_BARS 005 >',
+        '< REP {ch} CHAN_NAME {{HH 01 Pastor}} >',
+        '< REP {ch} CHAN_QUALITY 005 >',
+        '< REP {ch} FREQUENCY 0594075 >',
+    ],
+    'uhfr': [
+        '* SAMPLE {ch} ALL AB 080 100 4 003 *',
+        '* SAMPLE {ch} ALL XB 070 100 4 200 *',
+        '* REPORT {ch} TX_BAT 4 *',
+        '* REPORT {ch} CHAN_NAME Choir_1 *',
+        '* REPORT {ch} FREQUENCY 584350 *',
+    ],
+    'p10t': [
+        '< REP {ch} AUDIO_IN_LVL_L 0085488 >',
+        '< REP {ch} AUDIO_IN_LVL_R 0641928 >',
+        '< REP {ch} CHAN_NAME {{IEM A Band}} >',
+        '< REP {ch} FREQUENCY 0518200 >',
+    ],
+}
+
+CHANNELS = {'ulxd': 4, 'axtd': 4, 'uhfr': 2, 'p10t': 2}
+
+
+def capture(rx_type):
+    lines = []
+    for ch in range(1, CHANNELS[rx_type] + 1):
+        lines.extend(line.format(ch=ch) for line in TRAFFIC[rx_type])
+    return lines
+
+
+def bench(rx_type, count):
+    rx = ShureNetworkDevice('10.0.0.1', rx_type)
+    for ch in range(1, CHANNELS[rx_type] + 1):
+        rx.add_channel_device({'slot': ch, 'channel': ch})
+
+    lines = capture(rx_type)
+    replay = (lines * (count // len(lines) + 1))[:count]
+
+    start = time.perf_counter()
+    for line in replay:
+        rx.parse_raw_rx(line)
+    elapsed = time.perf_counter() - start
+
+    channel.chart_updates.drain()
+    channel.data_updates.drain()
+    return elapsed / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--max-ns', type=float)
+    args = parser.parse_args()
+
+    failed = False
+    print('{:>6} {:>12}'.format('type', 'ns/line'))
+    for rx_type in TRAFFIC:
+        ns = bench(rx_type, args.lines)
+        print('{:>6} {:>12.0f}'.format(rx_type, ns))
+        if args.max_ns and ns > args.max_ns:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Receiver I/O throughput: asyncio transport vs. the old thread + select() loop.
+
+Starts N fake ULX-D receivers on 127.0.0.x:2202 that stream SAMPLE lines as
+fast as the socket allows while a burst of GET commands is queued for every
+device. Reports frames/sec read and how long the command burst took to reach
+the receivers for each engine and device count.
+
+    python benchmarks/bench_socket_service.py [--devices 1,10,40] [--seconds 3]
+"""
+import os
+import sys
+import time
+import queue
+import select
+import socket
+import asyncio
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shure
+import transport
+from networkdevice import ShureNetworkDevice
+
+
+SAMPLE = b'< SAMPLE 1 ALL AX 097 037 >' * 64
+COMMANDS = 200
+
+
+class FakeReceiver(asyncio.Protocol):
+    received = 0
+    expected = 0
+    drained_at = None
+
+    def connection_made(self, t):
+        self.t = t
+        self.t.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.paused = False
+        self.stream()
+
+    def data_received(self, data):
+        FakeReceiver.received += data.count(b'>')
+        if FakeReceiver.received >= FakeReceiver.expected and FakeReceiver.drained_at is None:
+            FakeReceiver.drained_at = time.perf_counter()
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        self.stream()
+
+    def stream(self):
+        if not self.paused and not self.t.is_closing():
+            self.t.write(SAMPLE)
+            asyncio.get_event_loop().call_soon(self.stream)
+
+    def connection_lost(self, exc):
+        self.paused = True
+
+
+def run_fake_receivers(count, ready):
+    loop = asyncio.new_event_loop()
+    servers = []
+    for i in range(count):
+        server = loop.run_until_complete(
+            loop.create_server(FakeReceiver, '127.0.0.{}'.format(i + 1), transport.PORT, reuse_address=True))
+        servers.append(server)
+    ready.set((loop, servers))
+    loop.run_forever()
+
+
+class Ready(threading.Event):
+    def set(self, value=None):
+        self.value = value
+        super().set()
+
+
+def start_receivers(count):
+    ready = Ready()
+    threading.Thread(target=run_fake_receivers, args=(count, ready), daemon=True).start()
+    ready.wait()
+    return ready.value
+
+
+def stop_receivers(loop, servers):
+    for server in servers:
+        loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    time.sleep(.2)
+
+
+def make_devices(count):
+    devices = []
+    for i in range(count):
+        rx = ShureNetworkDevice('127.0.0.{}'.format(i + 1), 'ulxd')
+        rx.add_channel_device({'slot': i + 1, 'channel': 1})
+        devices.append(rx)
+    return devices
+
+
+class Counter:
+    def __init__(self):
+        self.frames = 0
+
+    def put(self, item):
+        self.frames += 1
+
+    def frames_received(self, protocol, frames):
+        self.frames += len(frames)
+
+
+# The pre-asyncio SocketService read/write loop, kept here as the baseline.
+def legacy_service(devices, sink, stop):
+    for rx in devices:
+        rx.f = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        rx.f.settimeout(.2)
+        rx.f.connect((rx.ip, transport.PORT))
+        rx.fileno = rx.f.fileno
+
+    while not stop.is_set():
+        readrx = devices
+        writerx = [rx for rx in readrx if not rx.writeQueue.empty()]
+        read_socks, write_socks, _ = select.select(readrx, writerx, readrx, .2)
+
+        for rx in read_socks:
+            data = rx.f.recv(1024).decode('UTF-8')
+            data = [e+'>' for e in data.split('>') if e]
+            for line in data:
+                sink.put((rx, line))
+
+        for rx in write_socks:
+            string = rx.writeQueue.get()
+            rx.f.sendall(bytearray(string, 'UTF-8'))
+
+    for rx in devices:
+        rx.f.close()
+
+
+def queue_commands(devices, put):
+    for rx in devices:
+        for i in range(COMMANDS):
+            put(rx, '< GET 1 CHAN_NAME >')
+    return time.perf_counter()
+
+
+def bench_legacy(count, seconds):
+    devices = make_devices(count)
+    sink = Counter()
+    stop = threading.Event()
+    started = queue_commands(devices, lambda rx, s: rx.writeQueue.put(s))
+    t = threading.Thread(target=legacy_service, args=(devices, sink, stop))
+    t.start()
+    time.sleep(seconds)
+    stop.set()
+    t.join()
+    return sink.frames, started
+
+
+def bench_asyncio(count, seconds):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    sink = Counter()
+    transport.start(loop, sink.frames_received)
+    devices = make_devices(count)
+    for rx in devices:
+        rx.socket_connect()
+    started = queue_commands(devices, lambda rx, s: rx.send(s))
+    loop.run_until_complete(asyncio.sleep(seconds))
+    for rx in devices:
+        rx.stop()
+    loop.run_until_complete(asyncio.sleep(.1))
+    loop.close()
+    transport.start(None, None)
+    return sink.frames, started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--devices', default='1,10,40')
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    print('{:>8} {:>8} {:>14} {:>14}'.format('engine', 'devices', 'frames/sec', 'burst drain ms'))
+    for count in [int(c) for c in args.devices.split(',')]:
+        for name, bench in [('select', bench_legacy), ('asyncio', bench_asyncio)]:
+            loop, servers = start_receivers(count)
+            FakeReceiver.received = 0
+            FakeReceiver.expected = count * COMMANDS
+            FakeReceiver.drained_at = None
+            frames, started = bench(count, args.seconds)
+            stop_receivers(loop, servers)
+
+            drain = 'incomplete'
+            if FakeReceiver.drained_at:
+                drain = '{:.1f}'.format((FakeReceiver.drained_at - started) * 1000)
+            print('{:>8} {:>8} {:>14.0f} {:>14}'.format(name, count, frames / args.seconds, drain))
+
+
+if __name__ == '__main__':
+    main()
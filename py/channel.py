@@ -1,26 +1,178 @@
 import time
 import re
+import threading
 from collections import defaultdict
+from contextlib import contextmanager
 import logging
 
 import config
 from device_config import BASE_CONST
 
-chart_update_list = []
-data_update_list = []
+# Audio meters keep their peak when several samples for a slot are merged
+PEAK_KEYS = ('audio_level', 'audio_level_l', 'audio_level_r')
+
+
+# Latest value per slot, written by the parser and drained by
+# SocketHandler.ws_dump, so each tick ships at most one entry per slot.
+# Inside batch() a thread's puts are merged locally and published under a
+# single lock acquisition when the batch ends.
+class UpdateBuffer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.local = threading.local()
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, slot, value):
+        staged = getattr(self.local, 'staged', None)
+        if staged is not None:
+            self.merge(staged, slot, value)
+            return
+        with self.lock:
+            self.merge(self.items, slot, value)
+
+    def merge(self, items, slot, value):
+        items[slot] = value
+
+    @contextmanager
+    def batch(self):
+        staged = self.local.staged = {}
+        try:
+            yield
+        finally:
+            self.local.staged = None
+            if staged:
+                with self.lock:
+                    for slot, value in staged.items():
+                        self.merge(self.items, slot, value)
+
+    def drain(self):
+        with self.lock:
+            items = self.items
+            self.items = {}
+        return list(items.values())
+
+
+# Chart samples for a slot are shipped at most once per interval (seconds).
+# Samples arriving in between are merged into the pending one.
+class ChartBuffer(UpdateBuffer):
+    def __init__(self, interval=0):
+        super().__init__()
+        self.interval = interval
+        self.sent = {}
+
+    def merge(self, items, slot, sample):
+        pending = items.get(slot)
+        if pending:
+            for key in PEAK_KEYS:
+                if key in sample and pending[key] > sample[key]:
+                    sample[key] = pending[key]
+        items[slot] = sample
+
+    def drain(self):
+        if not self.interval:
+            return super().drain()
+
+        now = time.time()
+        out = []
+        with self.lock:
+            for slot in list(self.items):
+                if now - self.sent.get(slot, 0) >= self.interval:
+                    out.append(self.items.pop(slot))
+                    self.sent[slot] = now
+        return out
+
+
+chart_updates = ChartBuffer()
+data_updates = UpdateBuffer()
+
+
+@contextmanager
+def batched_updates():
+    with chart_updates.batch(), data_updates.batch():
+        yield
+
+
+REPORT_TYPES = frozenset(['REP', 'REPLY', 'REPORT'])
+
+CHAN_ID_PATTERN = re.compile("([A-Za-z]+)?([-]?)([0-9])+")
+
+
+def parse_chan_name(chan_name_raw, extended_id=None, extended_name=None):
+    name = chan_name_raw.split()
+    prefix = CHAN_ID_PATTERN.match(name[0])
+
+    chan_id = ''
+    chan_name = ''
+
+    if prefix:
+        chan_id = name[0]
+        chan_name = ' '.join(name[1:])
+    elif name[0] == 'IEM' and len(name[1]) == 1:
+        chan_id = ' '.join(name[:2])
+        chan_name = ' '.join(name[2:])
+    else:
+        chan_name = chan_name_raw
+
+    # Prefer extended overrides whenever present. Do not gate on chan_name_raw equality,
+    # so manual/override names remain visible even if device-reported raw name changes.
+    if extended_id:
+        chan_id = extended_id
+    if extended_name:
+        chan_name = extended_name
+
+    return (chan_id, chan_name)
 
 
 class ChannelDevice:
+    # Hundreds of these take a setter call per meter sample, so keep them
+    # compact; subclasses list their own fields the same way.
+    __slots__ = (
+        'rx', 'cfg', 'chan_name_raw', 'channel', 'timestamp', 'frequency', 'slot',
+        'meter_interval', 'reported', 'raw', 'report_dispatch', 'sample_dispatch',
+        'chan_name_cache'
+    )
+
+    # ch_const field -> (setter, setter takes the whole value instead of the first word)
+    REPORT_HANDLERS = {}
+    # receiver type -> [(index into a SAMPLE line, setter)]
+    SAMPLE_FIELDS = {}
+
+    _report_tables = {}
+
     def __init__(self, rx, cfg):
         self.rx = rx
         self.cfg = cfg
         self.chan_name_raw = 'SLOT {}'.format(cfg['slot'])
+        # ((raw name, extended_id, extended_name), (id, name))
+        self.chan_name_cache = None
         self.channel = cfg['channel']
         self.timestamp = time.time() - 60
         self.frequency = '000000'
         self.slot = cfg['slot']
+        self.meter_interval = None
+        # report keyword -> time it was last reported
+        self.reported = {}
         self.raw = defaultdict(dict)
-        self.CHCONST = BASE_CONST[self.rx.type]['ch_const']
+        # Shared by every channel of this class and receiver type
+        self.report_dispatch, self.sample_dispatch = self.dispatch_tables(self.rx.type)
+
+    # Built once per device class and receiver type from BASE_CONST.
+    # Setters are stored unbound and called with the channel.
+    @classmethod
+    def dispatch_tables(cls, rx_type):
+        key = (cls, rx_type)
+        if key not in cls._report_tables:
+            ch_const = BASE_CONST[rx_type]['ch_const']
+            reports = {}
+            for field, (setter, whole) in cls.REPORT_HANDLERS.items():
+                if field in ch_const:
+                    reports.setdefault(ch_const[field], (getattr(cls, setter), whole))
+            samples = [(index, getattr(cls, setter)) for index, setter in cls.SAMPLE_FIELDS.get(rx_type, [])]
+            cls._report_tables[key] = (reports, samples)
+        return cls._report_tables[key]
 
 
     def set_frequency(self, frequency):
@@ -31,47 +183,74 @@ class ChannelDevice:
     def set_chan_name_raw(self, chan_name):
         chan_name = chan_name.replace('_', ' ')
         self.chan_name_raw = chan_name
+        self.chan_name_cache = None
 
+    # Every serialization of the channel asks for its name, so the result is
+    # kept until the raw name or the slot's extended overrides change. The
+    # overrides are part of the key because config edits replace them in place.
     def get_chan_name(self):
-        name = self.chan_name_raw.split()
-        prefix = re.match("([A-Za-z]+)?([-]?)([0-9])+", name[0])
-
-        chan_id = ''
-        chan_name = ''
-
-        if prefix:
-            chan_id = name[0]
-            chan_name = ' '.join(name[1:])
-        elif name[0] == 'IEM' and len(name[1]) == 1:
-            chan_id = ' '.join(name[:2])
-            chan_name = ' '.join(name[2:])
-        else:
-            chan_name = self.chan_name_raw
-
-        # Prefer extended overrides whenever present. Do not gate on chan_name_raw equality,
-        # so manual/override names remain visible even if device-reported raw name changes.
-        if 'extended_id' in self.cfg and self.cfg['extended_id']:
-            chan_id = self.cfg['extended_id']
-        if 'extended_name' in self.cfg and self.cfg['extended_name']:
-            chan_name = self.cfg['extended_name']
-
-        return (chan_id, chan_name)
-
-    def parse_raw_ch(self, data):
-        split = data.split()
+        key = (self.chan_name_raw, self.cfg.get('extended_id'), self.cfg.get('extended_name'))
+        cached = self.chan_name_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        name = parse_chan_name(*key)
+        self.chan_name_cache = (key, name)
+        return name
+
+    def parse_report(self, split):
+        self.reported[split[2]] = time.time()
+        handler = self.report_dispatch.get(split[2])
+        if handler:
+            setter, whole = handler
+            if whole:
+                setter(self, ' '.join(split[3:]))
+            else:
+                setter(self, split[3])
+
+    # Seconds since the receiver last reported keyword
+    def report_age(self, keyword, now=None):
+        return (now or time.time()) - self.reported.get(keyword, 0)
+
+    def parse_sample(self, split):
+        for index, setter in self.sample_dispatch:
+            setter(self, split[index])
+
+    # Called after each meter sample has been applied
+    def record_telemetry(self):
+        pass
+
+    # Fields shared by every channel type, without the raw reports only data.json carries
+    def state_json(self):
+        name = self.get_chan_name()
+        return {
+            'id': name[0], 'name': name[1], 'channel': self.channel,
+            'frequency': self.frequency, 'slot': self.slot,
+            'type': self.rx.type, 'name_raw': self.chan_name_raw
+        }
+
+    def ch_json(self):
+        data = self.state_json()
+        data['raw'] = self.raw
+        return data
+
+    def ch_json_mini(self):
+        data = self.state_json()
+        data['timestamp'] = time.time()
+        return data
+
+    def parse_raw_ch(self, split):
         self.raw[split[2]] = ' '.join(split[3:])
 
         try:
             if split[0] == 'SAMPLE' and split[2] == 'ALL':
                 self.parse_sample(split)
-                chart_update_list.append(self.chart_json())
+                self.record_telemetry()
+                chart_updates.put(self.slot, self.chart_json())
 
-            if split[0] in ['REP', 'REPLY', 'REPORT']:
+            if split[0] in REPORT_TYPES:
                 self.parse_report(split)
-
-                if self not in data_update_list:
-                    data_update_list.append(self)
+                data_updates.put(self.slot, self)
 
         except Exception as e:
-            print("Index Error(TX): {}".format(data.split()))
+            print("Index Error(TX): {}".format(split))
             print(e)
@@ -10,6 +10,7 @@ from shutil import copyfile
 import shure
 import offline
 import tornado_server
+import transport
 
 APPNAME = 'micboard'
 
@@ -23,6 +24,12 @@ gif_dir = ''
 
 group_update_list = []
 
+# Bumped whenever config_tree is loaded or saved
+version = 0
+
+# Seconds old receivers get to stop metering before the new slots connect
+RECONFIG_SETTLE = 2
+
 args = {}
 
 def uuid_init():
@@ -157,17 +164,23 @@ def reconfig(slots):
     config_tree['slots'] = slots
     save_current_config()
 
-    config_tree.clear()
     for device in shure.NetworkDevices:
-        # device.socket_disconnect()
         device.disable_metering()
+        device.stop()
         del device.channels[:]
 
     del shure.NetworkDevices[:]
     del offline.OfflineDevices[:]
 
-    time.sleep(2)
+    # Runs on the web server's loop, so wait without blocking it
+    if transport.loop:
+        transport.loop.call_later(RECONFIG_SETTLE, finish_reconfig)
+    else:
+        time.sleep(RECONFIG_SETTLE)
+        finish_reconfig()
 
+def finish_reconfig():
+    config_tree.clear()
     config()
     for rx in shure.NetworkDevices:
         rx.socket_connect()
@@ -181,6 +194,7 @@ def get_version_number():
 def read_json_config(file):
     global config_tree
     global gif_dir
+    global version
     with open(file) as config_file:
         config_tree = json.load(config_file)
 
@@ -195,12 +209,15 @@ def read_json_config(file):
 
     gif_dir = get_gif_dir()
     config_tree['micboard_version'] = get_version_number()
+    version += 1
 
 def write_json_config(data):
     with open(config_file(), 'w') as f:
         json.dump(data, f, indent=2, separators=(',', ': '), sort_keys=True)
 
 def save_current_config():
+    global version
+    version += 1
     # Clean up duplicate PCO sections before saving
     cleanup_duplicate_pco_config()
     return write_json_config(config_tree)
@@ -0,0 +1,57 @@
+from bisect import bisect_right
+from math import ceil
+
+import numpy as np
+
+
+# Raw IEM meter readings at which the displayed level steps up by 10
+IEM_AUDIO_THRESHOLDS = (10272, 23728, 85488, 246260, 641928, 1588744, 2157767, 2502970)
+
+# UHF-R reports audio as a bitmap that fills from the bottom. The level is
+# the highest lit bit out of 8, scaled to 100.
+UHFR_AUDIO = tuple(int(ceil(bits * (100./8))) for bits in range(65))
+
+
+def iem_audio_level(raw):
+    return 10 * bisect_right(IEM_AUDIO_THRESHOLDS, int(raw))
+
+
+def uhfr_audio_level(raw):
+    bits = int(raw).bit_length()
+    if bits < len(UHFR_AUDIO):
+        return UHFR_AUDIO[bits]
+    return int(ceil(bits * (100./8)))
+
+
+def mic_audio_level(rx_type, raw):
+    return MIC_AUDIO.get(rx_type, int)(raw)
+
+
+def mic_rf_level(rx_type, raw):
+    return int(MIC_RF.get(rx_type, float)(raw))
+
+
+MIC_AUDIO = {
+    'qlxd': lambda raw: 2 * int(raw),
+    'ulxd': lambda raw: 2 * int(raw),
+    'axtd': lambda raw: int(raw) - 20,
+    'uhfr': uhfr_audio_level,
+}
+
+MIC_RF = {
+    'qlxd': lambda raw: 100 * (float(raw) / 115),
+    'ulxd': lambda raw: 100 * (float(raw) / 115),
+    'axtd': lambda raw: 100 * (float(raw) / 115),
+    'uhfr': lambda raw: 100 * ((100 - float(raw)) / 80),
+}
+
+
+# Whole-array versions for converting a batch of samples at once
+def iem_audio_levels(raw):
+    return 10 * np.searchsorted(IEM_AUDIO_THRESHOLDS, np.asarray(raw, dtype=np.int64), side='right')
+
+
+def uhfr_audio_levels(raw):
+    # frexp's exponent is the bit length for non-negative integers below 2**53
+    bits = np.frexp(np.abs(np.asarray(raw, dtype=np.float64)))[1]
+    return np.asarray(UHFR_AUDIO)[np.minimum(bits, len(UHFR_AUDIO) - 1)]
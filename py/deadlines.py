@@ -0,0 +1,75 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+
+
+class DeadlineScheduler:
+    """Calls item.expire(now) when a deadline set for it passes.
+
+    Each item has at most one deadline. Asking for a later one while an
+    earlier one is pending does nothing: the earlier one fires, and expire()
+    schedules again if there is still something to wait for. Deadlines that
+    keep moving out, like a mic that keeps peaking, cost nothing until they
+    actually run out.
+    """
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.heap = []
+        # item -> pending deadline; heap entries that don't match are stale
+        self.due = {}
+        self.counter = itertools.count()
+        self.thread = None
+        self.fired = 0
+
+    def schedule(self, item, when):
+        with self.cond:
+            pending = self.due.get(item)
+            if pending is not None and pending <= when:
+                return
+            self.due[item] = when
+            heapq.heappush(self.heap, (when, next(self.counter), item))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            elif self.heap[0][2] is item:
+                self.cond.notify()
+
+    def cancel(self, item):
+        with self.cond:
+            self.due.pop(item, None)
+
+    def pop_expired(self, now):
+        expired = []
+        with self.cond:
+            while self.heap and self.heap[0][0] <= now:
+                when, _, item = heapq.heappop(self.heap)
+                if self.due.get(item) == when:
+                    del self.due[item]
+                    expired.append(item)
+        return expired
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.heap and self.due.get(self.heap[0][2]) != self.heap[0][0]:
+                    heapq.heappop(self.heap)
+                timeout = self.heap[0][0] - time.time() if self.heap else None
+                if timeout is None or timeout > 0:
+                    self.cond.wait(timeout)
+                    continue
+
+            now = time.time()
+            for item in self.pop_expired(now):
+                self.fired += 1
+                try:
+                    item.expire(now)
+                except Exception as e:
+                    logging.warning("Deadline for %s failed: %s", item, e)
+
+    def stats(self):
+        return {'pending': len(self.due), 'fired': self.fired}
+
+
+scheduler = DeadlineScheduler()
@@ -15,6 +15,7 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 
 import config
+import backgrounds
 
 # Google OAuth configuration
 def get_google_credentials():
@@ -275,6 +276,7 @@ def sync_drive_files():
                         logging.info(f"Removed {file_path} (no longer in Drive)")
         
         _last_file_state = current_files
+        backgrounds.index.scan()
         logging.info(f"Drive sync complete - {len(current_files)} files tracked")
         
     except Exception as e:
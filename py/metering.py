@@ -0,0 +1,97 @@
+import time
+
+import config
+import transport
+
+
+# Channels a display is showing stream meters at METER_ACTIVE (seconds).
+# Everything else drops to the 'meter_idle_interval' config value, 0 to stop
+# metering, once nobody has viewed it for METER_LINGER seconds so flipping
+# between groups doesn't keep reprogramming receivers. With 'record_telemetry'
+# set every channel stays at METER_ACTIVE so the recording is complete, as
+# does everything until some display has sent a view, so a server without
+# view-aware displays keeps metering for peak and battery status.
+METER_ACTIVE = .1
+METER_IDLE = 1
+METER_LINGER = 10
+
+
+class MeterController:
+    def __init__(self):
+        # client -> set of slots, or None for clients that never send a view
+        self.views = {}
+        self.last_viewed = {}
+        self.devices = []
+        self.recheck = None
+        self.view_received = False
+
+    def idle_interval(self):
+        return config.config_tree.get('meter_idle_interval', METER_IDLE)
+
+    def set_view(self, client, slots):
+        self.views[client] = slots
+        if slots is not None:
+            self.view_received = True
+        self.update()
+
+    def remove(self, client):
+        if self.views.pop(client, False) is not False:
+            self.update()
+
+    def viewed(self):
+        slots = set()
+        for view in self.views.values():
+            if view is None:
+                return None
+            slots.update(view)
+        return slots
+
+    def recording(self):
+        return bool(config.config_tree.get('record_telemetry'))
+
+    def interval(self, slot, now=None):
+        if self.recording() or not self.view_received:
+            return METER_ACTIVE
+        viewed = self.viewed()
+        if viewed is None or slot in viewed:
+            return METER_ACTIVE
+        if (now or time.time()) - self.last_viewed.get(slot, 0) < METER_LINGER:
+            return METER_ACTIVE
+        return self.idle_interval()
+
+    # Runs on the I/O loop whenever a view changes
+    def update(self, devices=None):
+        if devices is not None:
+            self.devices = devices
+
+        now = time.time()
+        viewed = self.viewed()
+        for slot in viewed or ():
+            self.last_viewed[slot] = now
+
+        lingering = False
+        for rx in self.devices:
+            for ch in rx.channels:
+                interval = self.interval(ch.slot, now)
+                if viewed is not None and ch.slot not in viewed and interval == METER_ACTIVE:
+                    lingering = True
+                if ch.meter_interval != interval:
+                    ch.meter_interval = interval
+                    rx.set_metering(ch.channel, interval)
+
+        if lingering and not self.recheck and transport.loop:
+            self.recheck = transport.loop.call_later(METER_LINGER, self.expire)
+
+    def expire(self):
+        self.recheck = None
+        self.update()
+
+    def stats(self):
+        counts = {}
+        for rx in self.devices:
+            for ch in rx.channels:
+                counts[ch.meter_interval] = counts.get(ch.meter_interval, 0) + 1
+        return [{'interval': k, 'channels': v} for k, v in sorted(counts.items(), key=lambda item: item[0] or 0)]
+
+
+controller = MeterController()
@@ -1,10 +1,12 @@
 import time
 import logging
-from math import ceil
 from datetime import timedelta
 
+import conversion
+import deadlines
+import telemetry
 from device_config import BASE_CONST
-from channel import ChannelDevice, data_update_list, chart_update_list
+from channel import ChannelDevice, data_updates
 
 
 BATTERY_TIMEOUT = 30*60
@@ -17,15 +19,32 @@ PEAK_LEVEL = {
 }
 
 
-# https://stackoverflow.com/questions/17027878/algorithm-to-find-the-most-significant-bit
-def MSB(audio_level):
-    bitpos = 0
-    while audio_level != 0:
-        bitpos = bitpos + 1
-        audio_level = audio_level >> 1
-    return bitpos
-
 class WirelessMic(ChannelDevice):
+    __slots__ = (
+        'battery', 'prev_battery', 'prev_battery_uhfr_raw', 'audio_level', 'rf_level',
+        'antenna', 'tx_offset', 'peakstamp', 'quality', 'runtime', 'status'
+    )
+
+    # Listed in the order the old if/elif chain checked them
+    REPORT_HANDLERS = {
+        'battery': ('set_battery', False),
+        'runtime': ('set_runtime', False),
+        'name': ('set_chan_name_raw', True),
+        'quality': ('set_tx_quality', False),
+        'frequency': ('set_frequency', False),
+        'tx_offset': ('set_tx_offset', False),
+    }
+
+    SAMPLE_FIELDS = {
+        'qlxd': [(3, 'set_antenna'), (4, 'set_rf_level'), (5, 'set_audio_level')],
+        'ulxd': [(3, 'set_antenna'), (4, 'set_rf_level'), (5, 'set_audio_level')],
+        # TO TEST: process_audio_bitmap
+        'uhfr': [(3, 'set_antenna'), (4, 'set_rf_level'), (6, 'set_battery'),
+                 (7, 'set_audio_level'), (7, 'process_audio_bitmap')],
+        'axtd': [(7, 'set_antenna'), (9, 'set_rf_level'), (6, 'set_audio_level'),
+                 (3, 'set_tx_quality'), (4, 'process_audio_bitmap')],
+    }
+
     def __init__(self, rx, cfg):
         super().__init__(rx, cfg)
         self.battery = 255
@@ -38,30 +57,24 @@ class WirelessMic(ChannelDevice):
         self.peakstamp = time.time() - 60
         self.quality = 255
         self.runtime = 65535
+        # Peak and battery state, kept current by update_status()
+        self.status = 'TX_COM_ERROR'
+        self.update_status()
 
     def set_antenna(self, antenna):
         self.antenna = antenna
 
     def set_peak_flag(self):
         self.peakstamp = time.time()
-        if self not in data_update_list:
-            data_update_list.append(self)
+        self.update_status(self.peakstamp)
+        data_updates.put(self.slot, self)
 
 
     def set_audio_level(self, audio_level):
-        audio_level = int(audio_level)
-        if self.rx.type in ['qlxd', 'ulxd']:
-            audio_level = 2 * audio_level
-
-        if self.rx.type == 'axtd':
-            audio_level = audio_level - 20
-
-        if self.rx.type == 'uhfr':
-            audio_level = int(ceil(MSB(audio_level) * (100./8)))
-
-        if self.rx.type in ['qlxd', 'ulxd']:
-            if audio_level >= PEAK_LEVEL[self.rx.type]:
-                self.set_peak_flag()
+        audio_level = conversion.mic_audio_level(self.rx.type, audio_level)
+        peak = PEAK_LEVEL.get(self.rx.type)
+        if peak is not None and audio_level >= peak:
+            self.set_peak_flag()
 
         self.audio_level = audio_level
 
@@ -71,17 +84,7 @@ class WirelessMic(ChannelDevice):
             self.set_peak_flag()
 
     def set_rf_level(self, rf_level):
-        rf_level = float(rf_level)
-        if self.rx.type in ['qlxd', 'ulxd']:
-            rf_level = 100 * (rf_level / 115)
-
-        if self.rx.type == 'axtd':
-            rf_level = 100 * (rf_level / 115)
-
-        if self.rx.type == 'uhfr':
-            rf_level = 100 * ((100 - rf_level) / 80)
-
-        self.rf_level = int(rf_level)
+        self.rf_level = conversion.mic_rf_level(self.rx.type, rf_level)
 
     def set_battery(self, level):
         if level == 'U':
@@ -92,6 +95,7 @@ class WirelessMic(ChannelDevice):
         if 1 <= level <= 5:
             self.prev_battery = level
             self.timestamp = time.time()
+        self.update_status()
 
     # https://stackoverflow.com/questions/1784952/how-get-hoursminutes
     def set_runtime(self, runtime):
@@ -116,45 +120,66 @@ class WirelessMic(ChannelDevice):
         # WCCC Specific State for unassigned microphones
         if self.rx.rx_com_status in ['DISCONNECTED', 'CONNECTING']:
             return 'RX_COM_ERROR'
-
-        if (time.time() - self.peakstamp) < PEAK_TIMEOUT:
-            return 'AUDIO_PEAK'
         # uncomment to ignore mic status of unassigned microphones
         # if not self.get_chan_name()[1]:
         #     return 'UNASSIGNED'
-
-        if (time.time() - self.timestamp) < BATTERY_TIMEOUT:
-            if 4 <= self.battery <= 5:
-                return 'GOOD'
-            elif self.battery == 255 and 4 <= self.prev_battery <= 5:
-                return 'PREV_GOOD'
-            elif self.battery == 3:
-                return 'REPLACE'
-            elif self.battery == 255 and self.prev_battery == 3:
-                return 'PREV_REPLACE'
-                # return 'UNASSIGNED'
-            elif 0 <= self.battery <= 2:
-                return 'CRITICAL'
-            elif self.battery == 255 and 0 <= self.prev_battery <= 2:
-                return 'PREV_CRITICAL'
-
+        return self.status
+
+    def battery_state(self):
+        if 4 <= self.battery <= 5:
+            return 'GOOD'
+        elif self.battery == 255 and 4 <= self.prev_battery <= 5:
+            return 'PREV_GOOD'
+        elif self.battery == 3:
+            return 'REPLACE'
+        elif self.battery == 255 and self.prev_battery == 3:
+            return 'PREV_REPLACE'
+            # return 'UNASSIGNED'
+        elif 0 <= self.battery <= 2:
+            return 'CRITICAL'
+        elif self.battery == 255 and 0 <= self.prev_battery <= 2:
+            return 'PREV_CRITICAL'
         return 'TX_COM_ERROR'
 
-    def ch_json(self):
-        name = self.get_chan_name()
-        return {
-            'id': name[0], 'name': name[1], 'channel': self.channel,
-            'antenna':self.antenna, 'audio_level': self.audio_level,
-            'rf_level': self.rf_level, 'frequency': self.frequency,
-            'battery':self.battery, 'tx_offset': self.tx_offset, 'quality': self.quality,
-            'status': self.tx_state(), 'slot': self.slot, 'raw': self.raw,
-            'type': self.rx.type, 'name_raw' : self.chan_name_raw, 'runtime' : self.runtime
-        }
-
-    def ch_json_mini(self):
-        data = self.ch_json()
-        data['timestamp'] = time.time()
-        del data['raw']
+    # Peak and battery states run out on their own, so the status is worked
+    # out here whenever its inputs change and again when the next timeout
+    # passes, rather than on every serialization. Returns True if it changed.
+    def update_status(self, now=None):
+        now = now or time.time()
+        peak_end = self.peakstamp + PEAK_TIMEOUT
+        battery_end = self.timestamp + BATTERY_TIMEOUT
+        if now < peak_end:
+            status, until = 'AUDIO_PEAK', peak_end
+        elif now < battery_end:
+            status, until = self.battery_state(), battery_end
+        else:
+            status, until = 'TX_COM_ERROR', None
+
+        if until is not None:
+            deadlines.scheduler.schedule(self, until)
+        changed = status != self.status
+        self.status = status
+        return changed
+
+    def expire(self, now):
+        if self.rx.stopped:
+            return
+        if self.update_status(now):
+            data_updates.put(self.slot, self)
+
+    def record_telemetry(self):
+        telemetry.store.record(
+            self.slot, self.audio_level, self.rf_level,
+            self.quality if self.quality != 255 else float('nan'),
+            self.battery if self.battery != 255 else float('nan'))
+
+    def state_json(self):
+        data = super().state_json()
+        data.update({
+            'antenna': self.antenna, 'audio_level': self.audio_level,
+            'rf_level': self.rf_level, 'battery': self.battery, 'tx_offset': self.tx_offset,
+            'quality': self.quality, 'status': self.tx_state(), 'runtime': self.runtime
+        })
         return data
 
     def chart_json(self):
@@ -165,39 +190,3 @@ class WirelessMic(ChannelDevice):
             'type': self.rx.type,
             'timestamp': time.time()
         }
-
-    def parse_sample(self, split):
-        if self.rx.type in ['qlxd', 'ulxd']:
-            self.set_antenna(split[3])
-            self.set_rf_level(split[4])
-            self.set_audio_level(split[5])
-
-        elif self.rx.type == 'uhfr':
-            self.set_antenna(split[3])
-            self.set_rf_level(split[4])
-            self.set_battery(split[6])
-            self.set_audio_level(split[7])
-            # TO TEST
-            self.process_audio_bitmap(split[7])
-
-        elif self.rx.type == 'axtd':
-            self.set_antenna(split[7])
-            self.set_rf_level(split[9])
-            self.set_audio_level(split[6])
-            self.set_tx_quality(split[3])
-            # TO TEST
-            self.process_audio_bitmap(split[4])
-
-    def parse_report(self, split):
-        if split[2] == self.CHCONST['battery']:
-            self.set_battery(split[3])
-        elif split[2] == self.CHCONST['runtime']:
-            self.set_runtime(split[3])
-        elif split[2] == self.CHCONST['name']:
-            self.set_chan_name_raw(' '.join(split[3:]))
-        elif split[2] == self.CHCONST['quality']:
-            self.set_tx_quality(split[3])
-        elif split[2] == self.CHCONST['frequency']:
-            self.set_frequency(split[3])
-        elif split[2] == self.CHCONST['tx_offset']:
-            self.set_tx_offset(split[3])
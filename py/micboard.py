@@ -13,16 +13,13 @@ def main():
 
     time.sleep(.1)
     rxquery_t = threading.Thread(target=shure.WirelessQueryQueue)
-    rxcom_t = threading.Thread(target=shure.SocketService)
     web_t = threading.Thread(target=tornado_server.twisted)
     discover_t = threading.Thread(target=discover.discover)
-    rxparse_t = threading.Thread(target=shure.ProcessRXMessageQueue)
 
     rxquery_t.start()
-    rxcom_t.start()
     web_t.start()
     discover_t.start()
-    rxparse_t.start()
+    shure.parsers.start()
 
 
 if __name__ == '__main__':
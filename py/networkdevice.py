@@ -1,15 +1,39 @@
 import time
 import queue
-import socket
+import random
+import asyncio
 from collections import defaultdict
 import logging
 
+import shure
+import transport
+import metering
+import queries
+import deadlines
 from device_config import BASE_CONST
+from channel import data_updates
 from iem import IEM
 from mic import WirelessMic
 
 
-PORT = 2202
+RX_MESSAGES = frozenset(['REP', 'REPORT', 'SAMPLE'])
+REPORT_MESSAGES = frozenset(['REP', 'REPORT'])
+CHANNEL_IDS = frozenset(['1', '2', '3', '4'])
+
+# Seconds of silence before a receiver is considered gone
+CONNECT_TIMEOUT = 2
+SILENCE_TIMEOUT = 5
+
+# A connected receiver that goes quiet is sent a GET and given this long
+# to answer. Channels nobody is viewing may meter slowly or not at all, so
+# silence alone doesn't mean the receiver is gone.
+KEEPALIVE_TIMEOUT = 2
+
+# Reconnect attempts back off exponentially, with jitter so receivers that
+# dropped together don't all retry in the same instant
+RETRY_BASE = 1
+RETRY_MAX = 30
+RETRY_JITTER = .25
 
 
 class ShureNetworkDevice:
@@ -17,45 +41,147 @@ class ShureNetworkDevice:
         self.ip = ip
         self.type = type
         self.channels = []
+        self.channel_map = {}
         self.rx_com_status = 'DISCONNECTED'
         self.writeQueue = queue.Queue()
-        self.f = None
-        self.socket_watchdog = int(time.perf_counter())
+        self.protocol = None
+        self.connect_task = None
+        self.flush_pending = False
+        self.socket_watchdog = time.perf_counter()
+        self.watchdog_timeout = CONNECT_TIMEOUT
+        self.keepalive_sent = False
+        self.timer = None
+        self.failures = 0
+        self.stopped = False
+        # (channel, keyword) -> when the GET was sent / when it is next due
+        self.pending_queries = {}
+        self.query_due = {}
         self.raw = defaultdict(dict)
         self.BASECONST = BASE_CONST[self.type]['base_const']
+        self.protocol_type = BASE_CONST[self.type]['PROTOCOL']
 
     def socket_connect(self):
+        transport.call_soon(self._socket_connect)
+
+    def _socket_connect(self):
+        self._close_protocol()
+        self.set_rx_com_status('CONNECTING')
+        self.pending_queries.clear()
+        # Whatever a failed attempt left queued is stale; getAll covers it
+        with self.writeQueue.mutex:
+            self.writeQueue.queue.clear()
+        self.apply_metering()
+
+        for string in self.get_all():
+            self.send(string)
+
+        self.connect_task = transport.loop.create_task(self._connect())
+        self.arm_watchdog(CONNECT_TIMEOUT)
+
+    async def _connect(self):
         try:
-            if BASE_CONST[self.type]['PROTOCOL'] == 'TCP':
-                self.f = socket.socket(socket.AF_INET, socket.SOCK_STREAM) #TCP
-                self.f.settimeout(.2)
-                self.f.connect((self.ip, PORT))
+            self.protocol = await transport.connect(self, CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            logging.debug('connect to %s failed: %r', self.ip, e)
+            self.set_rx_com_status('DISCONNECTED')
+            self.schedule_reconnect()
+        finally:
+            self.connect_task = None
+
+    def socket_disconnect(self):
+        self._close_protocol()
+        self.set_rx_com_status('DISCONNECTED')
+        self.schedule_reconnect()
 
+    # Close for good, after anything already queued has been written
+    def stop(self):
+        # Callers drop the channels straight after, so their timers go now
+        for channel in self.channels:
+            deadlines.scheduler.cancel(channel)
+        transport.call_soon(self._stop)
 
-            elif BASE_CONST[self.type]['PROTOCOL'] == 'UDP':
-                self.f = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) #UDP
+    def _stop(self):
+        self.stopped = True
+        self._cancel_timer()
+        self._close_protocol()
+        shure.parsers.release(self)
 
-            self.set_rx_com_status('CONNECTING')
-            self.enable_metering(.1)
+    def _close_protocol(self):
+        if self.connect_task:
+            self.connect_task.cancel()
+            self.connect_task = None
+        if self.protocol:
+            self.protocol.close()
+            self.protocol = None
 
-            for string in self.get_all():
-                self.writeQueue.put(string)
-        except socket.error as e:
+    def connection_lost(self, protocol):
+        if protocol is self.protocol:
+            self.protocol = None
             self.set_rx_com_status('DISCONNECTED')
+            self.schedule_reconnect()
 
-        self.socket_watchdog = int(time.perf_counter())
+    def _cancel_timer(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
 
+    # Frames only refresh socket_watchdog; the timer re-arms itself for the
+    # remaining time when it fires instead of being reset on every read.
+    def arm_watchdog(self, timeout):
+        self._cancel_timer()
+        self.socket_watchdog = time.perf_counter()
+        self.watchdog_timeout = timeout
+        self.keepalive_sent = False
+        self.timer = transport.loop.call_later(timeout, self.check_watchdog)
 
-    def socket_disconnect(self):
-        self.f.close()
-        self.set_rx_com_status('DISCONNECTED')
-        self.socket_watchdog = int(time.perf_counter())
+    def check_watchdog(self):
+        self.timer = None
+        remaining = self.watchdog_timeout - (time.perf_counter() - self.socket_watchdog)
+        if remaining > 0:
+            self.keepalive_sent = False
+            self.timer = transport.loop.call_later(remaining, self.check_watchdog)
+            return
+
+        if self.rx_com_status == 'CONNECTED' and not self.keepalive_sent:
+            self.keepalive_sent = True
+            self.send(self.keepalive())
+            self.timer = transport.loop.call_later(KEEPALIVE_TIMEOUT, self.check_watchdog)
+            return
+
+        logging.debug('disconnected from: %s', self.ip)
+        self.socket_disconnect()
+
+    def retry_delay(self):
+        delay = min(RETRY_MAX, RETRY_BASE * 2 ** self.failures)
+        return delay * random.uniform(1 - RETRY_JITTER, 1 + RETRY_JITTER)
 
+    def schedule_reconnect(self):
+        self._cancel_timer()
+        if self.stopped:
+            return
+        self.timer = transport.loop.call_later(self.retry_delay(), self._socket_connect)
+        self.failures += 1
 
-    def fileno(self):
-        return self.f.fileno()
+    def send(self, string):
+        self.writeQueue.put(string)
+        if not self.flush_pending:
+            # Set first so a flush that runs straight away clears it
+            self.flush_pending = True
+            if not transport.call_soon(self.flush):
+                self.flush_pending = False
+
+    def flush(self):
+        self.flush_pending = False
+        if self.protocol:
+            self.protocol.flush()
 
     def set_rx_com_status(self, status):
+        if status != self.rx_com_status:
+            for channel in self.channels:
+                data_updates.put(channel.slot, channel)
+            if status == 'CONNECTED':
+                self.failures = 0
+                self.watchdog_timeout = SILENCE_TIMEOUT
         self.rx_com_status = status
         # if status == 'CONNECTED':
         #     print("Connected to {} at {}".format(self.ip,datetime.datetime.now()))
@@ -64,25 +190,34 @@ class ShureNetworkDevice:
 
     def add_channel_device(self, cfg):
         if BASE_CONST[self.type]['DEVICE_CLASS'] == 'WirelessMic':
-            self.channels.append(WirelessMic(self, cfg))
+            ch = WirelessMic(self, cfg)
         elif BASE_CONST[self.type]['DEVICE_CLASS'] == 'IEM':
-            self.channels.append(IEM(self, cfg))
+            ch = IEM(self, cfg)
+        else:
+            return
+
+        self.channels.append(ch)
+        self.channel_map[str(ch.channel)] = ch
 
     def get_device_by_channel(self, channel):
-        return next((x for x in self.channels if x.channel == int(channel)), None)
+        return self.channel_map.get(str(channel))
 
     def parse_raw_rx(self, data):
         data = data.strip('< >').strip('* ')
-        data = data.replace('{', '').replace('}', '')
+        if '{' in data:
+            data = data.replace('{', '').replace('}', '')
         data = data.rstrip()
         split = data.split()
         if data:
             try:
-                if split[0] in ['REP', 'REPORT', 'SAMPLE'] and split[1] in ['1', '2', '3', '4']:
-                    ch = self.get_device_by_channel(int(split[1]))
-                    ch.parse_raw_ch(data)
+                if split[0] in RX_MESSAGES and split[1] in CHANNEL_IDS:
+                    if self.pending_queries:
+                        self.pending_queries.pop((split[1], split[2]), None)
+                    ch = self.channel_map.get(split[1])
+                    if ch:
+                        ch.parse_raw_ch(split)
 
-                elif split[0] in ['REP', 'REPORT']:
+                elif split[0] in REPORT_MESSAGES:
                     self.raw[split[1]] = ' '.join(split[2:])
             except:
                 logging.warning("Index Error(RX): %s", data)
@@ -102,26 +237,41 @@ class ShureNetworkDevice:
 
         return ret
 
-    def get_query_strings(self):
+    def keepalive(self):
+        channels = self.get_channels()
+        return self.BASECONST['query'][0].format(channels[0] if channels else 1)
+
+    # [(channel, keyword, string)], keyed the way replies are parsed
+    def get_queries(self):
         ret = []
         for channel in self.get_channels():
             for s in self.BASECONST['query']:
-                ret.append(s.format(channel))
+                ret.append((str(channel), queries.query_keyword(s), s.format(channel)))
 
         return ret
 
 
-    def enable_metering(self, interval):
-        if self.type in ['qlxd', 'ulxd', 'axtd', 'p10t']:
-            for i in self.get_channels():
-                self.writeQueue.put('< SET {} METER_RATE {:05d} >'.format(i, int(interval * 1000)))
+    def set_metering(self, channel, interval):
+        if not interval:
+            self.send(self.BASECONST['meter_stop'].format(channel))
+        elif self.type in ['qlxd', 'ulxd', 'axtd', 'p10t']:
+            self.send('< SET {} METER_RATE {:05d} >'.format(channel, int(interval * 1000)))
         elif self.type == 'uhfr':
-            for i in self.get_channels():
-                self.writeQueue.put('* METER {} ALL {:03d} *'.format(i, int(interval/30 * 1000)))
+            self.send('* METER {} ALL {:03d} *'.format(channel, int(interval/30 * 1000)))
+
+    def enable_metering(self, interval):
+        for i in self.get_channels():
+            self.set_metering(i, interval)
+
+    # Each channel at the rate the displays currently need
+    def apply_metering(self):
+        for ch in self.channels:
+            ch.meter_interval = metering.controller.interval(ch.slot)
+            self.set_metering(ch.channel, ch.meter_interval)
 
     def disable_metering(self):
         for i in self.get_channels():
-            self.writeQueue.put(self.BASECONST['meter_stop'].format(i))
+            self.send(self.BASECONST['meter_stop'].format(i))
 
     def net_json(self):
         ch_data = []
@@ -496,8 +496,8 @@ class PCOSlotOverridesHandler(RequestHandler):
                             import shure
                             import channel as channel_mod
                             ch = shure.get_network_device_by_slot(slot_num)
-                            if ch and ch not in channel_mod.data_update_list:
-                                channel_mod.data_update_list.append(ch)
+                            if ch:
+                                channel_mod.data_updates.put(ch.slot, ch)
                         except Exception as _e2:
                             logging.error(f"WS push error for slot {slot_num}: {_e2}")
             except Exception as _e:
@@ -548,8 +548,8 @@ class PCOSlotOverridesHandler(RequestHandler):
                                     import shure
                                     import channel as channel_mod
                                     ch = shure.get_network_device_by_slot(s_int)
-                                    if ch and ch not in channel_mod.data_update_list:
-                                        channel_mod.data_update_list.append(ch)
+                                    if ch:
+                                        channel_mod.data_updates.put(ch.slot, ch)
                                 except Exception as _e2:
                                     logging.error(f"WS push error for slot {s_int}: {_e2}")
                     else:
@@ -565,8 +565,8 @@ class PCOSlotOverridesHandler(RequestHandler):
                             import channel as channel_mod
                             for s_int in range(1, 7):
                                 ch = shure.get_network_device_by_slot(s_int)
-                                if ch and ch not in channel_mod.data_update_list:
-                                    channel_mod.data_update_list.append(ch)
+                                if ch:
+                                    channel_mod.data_updates.put(ch.slot, ch)
                         except Exception as _e3:
                             logging.error(f"WS bulk push error: {_e3}")
             except Exception as _e:
@@ -592,8 +592,8 @@ class PCOSlotOverridesHandler(RequestHandler):
                                     import shure
                                     import channel as channel_mod
                                     ch = shure.get_network_device_by_slot(s_int)
-                                    if ch and ch not in channel_mod.data_update_list:
-                                        channel_mod.data_update_list.append(ch)
+                                    if ch:
+                                        channel_mod.data_updates.put(ch.slot, ch)
                                 except Exception as _e2:
                                     logging.error(f"WS push error for slot {s_int}: {_e2}")
                     else:
@@ -609,8 +609,8 @@ class PCOSlotOverridesHandler(RequestHandler):
                             import channel as channel_mod
                             for s_int in range(1, 7):
                                 ch = shure.get_network_device_by_slot(s_int)
-                                if ch and ch not in channel_mod.data_update_list:
-                                    channel_mod.data_update_list.append(ch)
+                                if ch:
+                                    channel_mod.data_updates.put(ch.slot, ch)
                         except Exception as _e3:
                             logging.error(f"WS bulk push error (clear non-live): {_e3}")
             except Exception as _e:
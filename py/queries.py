@@ -0,0 +1,96 @@
+import time
+import random
+
+import config
+
+
+# Seconds between polls of each parameter. Names rarely change; batteries
+# are what operators watch.
+QUERY_INTERVAL = 10
+QUERY_INTERVALS = {
+    'CHAN_NAME': 60,
+    'GROUP_CHAN': 60,
+    'BATT_BARS': 10,
+    'TX_BAT': 10,
+    'TX_BATT_BARS': 10,
+}
+
+# A query with no reply after this long is assumed lost and sent again
+QUERY_TIMEOUT = 30
+
+# How often the scheduler wakes to send whatever is due
+QUERY_TICK = .5
+
+# With 'query_mode' set to 'push', receivers are trusted to report changes
+# on their own. A parameter is only polled once nothing has been heard for
+# it in this many of its intervals.
+PUSH_STALE_INTERVALS = 6
+
+
+def query_keyword(string):
+    return string.split()[3]
+
+
+class QueryScheduler:
+    """Polls each receiver parameter on its own interval.
+
+    Every (receiver, channel, parameter) starts at a random point in its
+    interval so polls are spread out rather than sent in one burst. A query
+    still waiting for its reply is not sent again until QUERY_TIMEOUT. In
+    push mode, parameters the receiver has reported recently are skipped.
+    """
+    def __init__(self):
+        self.sent = 0
+        self.skipped = 0
+        self.lost = 0
+        self.fresh = 0
+
+    def interval(self, keyword):
+        return QUERY_INTERVALS.get(keyword, QUERY_INTERVAL)
+
+    def push_mode(self):
+        return config.config_tree.get('query_mode') == 'push'
+
+    def poll(self, devices, now=None):
+        now = now or time.time()
+        push = self.push_mode()
+        for rx in devices:
+            if rx.rx_com_status != 'CONNECTED':
+                continue
+
+            for channel, keyword, string in rx.get_queries():
+                key = (channel, keyword)
+                interval = self.interval(keyword)
+                due = rx.query_due.get(key)
+                if due is None:
+                    rx.query_due[key] = now + random.uniform(0, interval)
+                    continue
+                if now < due:
+                    continue
+                rx.query_due[key] = now + interval
+
+                ch = rx.channel_map.get(channel)
+                if push and ch and ch.report_age(keyword, now) < interval * PUSH_STALE_INTERVALS:
+                    self.fresh += 1
+                    continue
+
+                sent = rx.pending_queries.get(key)
+                if sent is not None:
+                    if now - sent < QUERY_TIMEOUT:
+                        self.skipped += 1
+                        continue
+                    self.lost += 1
+
+                rx.pending_queries[key] = now
+                rx.send(string)
+                self.sent += 1
+
+    def stats(self, devices):
+        return {
+            'mode': 'push' if self.push_mode() else 'poll',
+            'sent': self.sent, 'skipped': self.skipped, 'lost': self.lost, 'fresh': self.fresh,
+            'outstanding': sum(len(rx.pending_queries) for rx in devices)
+        }
+
+
+scheduler = QueryScheduler()
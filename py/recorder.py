@@ -0,0 +1,275 @@
+import os
+import mmap
+import time
+import calendar
+import zlib
+import struct
+import logging
+import warnings
+import threading
+
+import numpy as np
+
+import config
+import telemetry
+
+
+# Seconds of samples gathered from the telemetry store per compressed block
+BLOCK_SECONDS = 10
+
+# Hours of recordings kept when 'telemetry_retention_hours' isn't set
+RETENTION_HOURS = 24
+
+SEGMENT_SUFFIX = '.tlm'
+
+# magic, slot, sample count, compressed length, first and last timestamp.
+# Each block holds one slot, so reads skip other slots without decompressing.
+BLOCK_HEADER = struct.Struct('<4sHIIdd')
+BLOCK_MAGIC = b'MBT2'
+
+
+def segment_name(timestamp):
+    return time.strftime('%Y%m%d-%H', time.gmtime(timestamp)) + SEGMENT_SUFFIX
+
+
+def segment_hour(name):
+    return calendar.timegm(time.strptime(name[:-len(SEGMENT_SUFFIX)], '%Y%m%d-%H'))
+
+
+# Columns are stored one after another so similar bytes sit together,
+# which roughly doubles what zlib gets out of interleaved records.
+def encode_block(slot, times, values):
+    payload = times.astype('<f8').tobytes() + np.ascontiguousarray(values.T, dtype='<f4').tobytes()
+    data = zlib.compress(payload, 1)
+    header = BLOCK_HEADER.pack(BLOCK_MAGIC, slot, len(times), len(data), times.min(), times.max())
+    return header + data
+
+
+def decode_block(count, data):
+    payload = zlib.decompress(data)
+    times = np.frombuffer(payload, '<f8', count)
+    values = np.frombuffer(payload, '<f4', count * len(telemetry.METRICS), count * 8)
+    return times, values.reshape(len(telemetry.METRICS), count).T
+
+
+def block_at(mapped, offset):
+    """Return the header fields of an intact block starting at offset, or None.
+
+    A block is intact if its data fits in the file and is followed by the
+    end of the file or another block. A block cut short by a crash, with
+    later blocks appended after it, fails the second check.
+    """
+    if offset + BLOCK_HEADER.size > len(mapped):
+        return None
+    magic, slot, count, length, first, last = BLOCK_HEADER.unpack_from(mapped, offset)
+    end = offset + BLOCK_HEADER.size + length
+    if magic != BLOCK_MAGIC or end > len(mapped):
+        return None
+    if end < len(mapped) and mapped[end:end + len(BLOCK_MAGIC)] != BLOCK_MAGIC:
+        return None
+    return slot, count, length, first, last
+
+
+def read_segment(path, start, end, wanted=None):
+    """Yield (times, slots, values) for blocks in path overlapping [start, end].
+
+    The file is memory-mapped and only blocks for wanted slots that overlap
+    the range are decompressed. Damaged blocks are skipped by searching for
+    the next block header.
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return
+    with mapped:
+        offset = 0
+        while offset + BLOCK_HEADER.size <= len(mapped):
+            block = block_at(mapped, offset)
+            if block is not None:
+                slot, count, length, first, last = block
+                data = offset + BLOCK_HEADER.size
+                if last >= start and first <= end and (wanted is None or slot in wanted):
+                    try:
+                        times, values = decode_block(count, mapped[data:data + length])
+                    except (zlib.error, ValueError):
+                        block = None
+                    else:
+                        if first < start or last > end:
+                            keep = (times >= start) & (times <= end)
+                            times, values = times[keep], values[keep]
+                        if len(times):
+                            yield times, np.full(len(times), slot, dtype=np.uint16), values
+
+            if block is None:
+                offset = mapped.find(BLOCK_MAGIC, offset + 1)
+                if offset < 0:
+                    break
+            else:
+                offset = data + length
+
+
+def repair_segment(path):
+    """Cut path back to its last intact block, so appends after a crash
+    don't follow a partial one. Returns the bytes removed."""
+    size = os.path.getsize(path)
+    if not size:
+        return 0
+    with open(path, 'r+b') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            offset = 0
+            while True:
+                block = block_at(mapped, offset)
+                if block is None:
+                    break
+                offset += BLOCK_HEADER.size + block[2]
+        if offset < size:
+            f.truncate(offset)
+    return size - offset
+
+
+class Recorder:
+    """Appends telemetry to hourly segment files and serves it back."""
+    def __init__(self, path, store=None):
+        self.path = path
+        self.store = store or telemetry.store
+        self.cursors = {}
+        self.written = 0
+
+    def retention(self):
+        return config.config_tree.get('telemetry_retention_hours', RETENTION_HOURS)
+
+    def flush(self):
+        times, slots, values = self.store.since(self.cursors)
+        if not len(times):
+            return 0
+
+        # Split at hour boundaries so every segment holds only its own hour,
+        # then into one block per slot
+        hours = (times // 3600).astype(np.int64)
+        for hour in np.unique(hours):
+            in_hour = hours == hour
+            blocks = []
+            for slot in np.unique(slots[in_hour]):
+                part = in_hour & (slots == slot)
+                blocks.append(encode_block(int(slot), times[part], values[part]))
+            with open(os.path.join(self.path, segment_name(hour * 3600)), 'ab') as f:
+                f.write(b''.join(blocks))
+        self.written += len(times)
+        return len(times)
+
+    # Only the newest segment can still be appended to after a restart
+    def repair(self):
+        segments = self.segments()
+        if segments:
+            removed = repair_segment(os.path.join(self.path, segments[-1]))
+            if removed:
+                logging.warning("Removed %d bytes of damaged telemetry from %s", removed, segments[-1])
+
+    def segments(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+        return sorted(n for n in names if n.endswith(SEGMENT_SUFFIX))
+
+    def expire(self, now=None):
+        cutoff = (now or time.time()) - self.retention() * 3600
+        for name in self.segments():
+            if segment_hour(name) + 3600 < cutoff:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError as e:
+                    logging.warning("Could not remove %s: %s", name, e)
+
+    def read(self, start, end, slots=None):
+        """Return (times, slots, values) recorded between start and end, oldest first."""
+        parts = []
+        for name in self.segments():
+            hour = segment_hour(name)
+            if hour + 3600 < start or hour > end:
+                continue
+            parts.extend(read_segment(os.path.join(self.path, name), start, end,
+                                      None if slots is None else set(slots)))
+
+        if not parts:
+            return np.zeros(0), np.zeros(0, dtype=np.uint16), np.zeros((0, len(telemetry.METRICS)), dtype=np.float32)
+        times, slot_ids, values = (np.concatenate(column) for column in zip(*parts))
+        order = np.argsort(times, kind='stable')
+        return times[order], slot_ids[order], values[order]
+
+    def envelopes(self, slots, start, end, points):
+        """Min-max decimation of the recording for each slot.
+
+        [start, end) is split into points equal buckets. For every slot and
+        metric, each non-empty bucket gets the min, max and last value, so
+        short dropouts survive however far the series is reduced. Returns
+        {slot: {'time': [bucket start], metric: {'min', 'max', 'last'}}}.
+        """
+        times, slot_ids, values = self.read(start, end, slots)
+        out = {slot: {'time': [], **{m: {'min': [], 'max': [], 'last': []} for m in telemetry.METRICS}}
+               for slot in slots}
+        if not len(times):
+            return out
+
+        width = (end - start) / points
+        buckets = np.minimum(((times - start) / width).astype(np.int64), points - 1)
+        # read() returns samples in time order; a stable sort keeps it per bucket
+        keys = slot_ids.astype(np.int64) * points + buckets
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], values[order]
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        last = np.r_[first[1:], len(keys)] - 1
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            lo = np.fmin.reduceat(values, first, axis=0)
+            hi = np.fmax.reduceat(values, first, axis=0)
+        latest = values[last]
+
+        group_slots = keys[first] // points
+        group_times = start + (keys[first] % points) * width
+        for slot in np.unique(group_slots):
+            rows = group_slots == slot
+            series = out[int(slot)]
+            series['time'] = np.round(group_times[rows], 3).tolist()
+            for m, metric in enumerate(telemetry.METRICS):
+                series[metric] = {
+                    'min': _numbers(lo[rows, m]), 'max': _numbers(hi[rows, m]),
+                    'last': _numbers(latest[rows, m])
+                }
+        return out
+
+    def run(self):
+        last_expire = 0
+        while True:
+            time.sleep(BLOCK_SECONDS)
+            try:
+                self.flush()
+                if time.time() - last_expire > 3600:
+                    self.expire()
+                    last_expire = time.time()
+            except Exception as e:
+                logging.warning("Telemetry recording failed: %s", e)
+
+
+def _numbers(column):
+    # NaN is the only value not equal to itself
+    return [v if v == v else None for v in np.round(column.astype(np.float64), 2).tolist()]
+
+
+recorder = None
+
+
+def telemetry_dir():
+    path = config.config_path('telemetry')
+    if not os.path.exists(path):
+        os.makedirs(path)
+    return path
+
+
+def start_recording():
+    global recorder
+    recorder = Recorder(telemetry_dir())
+    recorder.repair()
+    threading.Thread(target=recorder.run, daemon=True).start()
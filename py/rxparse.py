@@ -0,0 +1,141 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import nullcontext
+
+import transport
+
+
+# Receivers are spread across this many parse threads
+PARSE_WORKERS = 4
+
+# Meter samples are superseded by the next one, so when a shard falls behind
+# the oldest samples are dropped. Reports are never dropped; once this many
+# are waiting, reading from the sending receiver pauses until the shard drains.
+SAMPLE_BACKLOG = 512
+REPORT_BACKLOG = 2048
+
+# Most messages parsed per wakeup; their updates are published together
+PARSE_BATCH = 256
+
+
+def is_sample(line):
+    return line.lstrip('<* ').startswith('SAMPLE')
+
+
+class ParseShard:
+    def __init__(self, index, batch=nullcontext):
+        self.index = index
+        self.batch = batch
+        self.cond = threading.Condition()
+        self.reports = deque()
+        self.samples = deque()
+        self.paused = set()
+        self.receivers = 0
+
+        self.received = 0
+        self.parsed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    # Called on the I/O loop with every frame from one read
+    def put(self, protocol, frames):
+        now = time.perf_counter()
+        rx = protocol.rx
+        with self.cond:
+            for line in frames:
+                if is_sample(line):
+                    if len(self.samples) >= SAMPLE_BACKLOG:
+                        self.samples.popleft()
+                        self.dropped += 1
+                    self.samples.append((rx, line, now))
+                else:
+                    self.reports.append((rx, line, now))
+
+            if len(self.reports) >= REPORT_BACKLOG and protocol not in self.paused:
+                logging.warning("Parser %d behind, pausing reads from %s", self.index, rx.ip)
+                self.paused.add(protocol)
+                protocol.pause_reading()
+
+            self.received += len(frames)
+            self.max_depth = max(self.max_depth, len(self.reports) + len(self.samples))
+            self.cond.notify()
+
+    # Forget a stopped receiver along with anything it still had queued
+    def release(self, rx):
+        with self.cond:
+            self.receivers -= 1
+            self.reports = deque(entry for entry in self.reports if entry[0] is not rx)
+            self.samples = deque(entry for entry in self.samples if entry[0] is not rx)
+            self.paused = {protocol for protocol in self.paused if protocol.rx is not rx}
+
+    # Reports come first so state changes never wait behind a meter flood
+    def take(self, limit=PARSE_BATCH):
+        batch = []
+        with self.cond:
+            while not self.reports and not self.samples:
+                self.cond.wait()
+            for queue in (self.reports, self.samples):
+                while queue and len(batch) < limit:
+                    batch.append(queue.popleft())
+
+            paused = ()
+            if self.paused and len(self.reports) < REPORT_BACKLOG // 2:
+                paused, self.paused = self.paused, set()
+
+        for protocol in paused:
+            transport.call_soon(protocol.resume_reading)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.take()
+            with self.batch():
+                for rx, line, _ in batch:
+                    rx.parse_raw_rx(line)
+
+            latency = time.perf_counter() - min(received for _, _, received in batch)
+            self.latency = .9 * self.latency + .1 * latency
+            self.max_latency = max(self.max_latency, latency)
+            self.parsed += len(batch)
+
+    def stats(self):
+        return {
+            'shard': self.index, 'receivers': self.receivers,
+            'depth': len(self.reports) + len(self.samples), 'max_depth': self.max_depth,
+            'received': self.received, 'parsed': self.parsed, 'dropped': self.dropped,
+            'latency_ms': round(self.latency * 1000, 2),
+            'max_latency_ms': round(self.max_latency * 1000, 2)
+        }
+
+
+class ParserPool:
+    def __init__(self, workers=PARSE_WORKERS, batch=nullcontext):
+        self.shards = [ParseShard(i, batch) for i in range(workers)]
+        self.assigned = {}
+
+    def shard(self, rx):
+        shard = self.assigned.get(rx)
+        if shard is None:
+            shard = min(self.shards, key=lambda s: s.receivers)
+            shard.receivers += 1
+            self.assigned[rx] = shard
+        return shard
+
+    def release(self, rx):
+        shard = self.assigned.pop(rx, None)
+        if shard is not None:
+            shard.release(rx)
+
+    def frames_received(self, protocol, frames):
+        self.shard(protocol.rx).put(protocol, frames)
+
+    def start(self):
+        for shard in self.shards:
+            threading.Thread(target=shard.run, daemon=True).start()
+
+    def stats(self):
+        return [shard.stats() for shard in self.shards]
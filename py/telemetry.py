@@ -0,0 +1,156 @@
+import time
+import warnings
+import threading
+
+import numpy as np
+
+
+METRICS = ('audio', 'rf', 'quality', 'battery')
+
+# Samples kept per slot; about 7 minutes at the default 100ms meter rate
+CAPACITY = 4096
+
+# Rows are added in blocks as new slots appear
+ROW_BLOCK = 16
+
+
+class TelemetryStore:
+    """Fixed-size ring buffers of recent meter samples for every slot.
+
+    All slots share one float32 array of shape (rows, capacity, metrics)
+    and one float64 array of timestamps, so queries across every slot are
+    single numpy operations. The parser writes through flat memoryviews of
+    the same buffers, which costs far less per sample than numpy indexing
+    and allocates nothing. Missing values are NaN.
+    """
+    def __init__(self, capacity=CAPACITY):
+        self.lock = threading.Lock()
+        self.capacity = capacity
+        self.rows = {}
+        self.head = []
+        self.count = []
+        # Samples ever written per row, for readers that follow the rings
+        self.written = []
+        self._allocate(ROW_BLOCK)
+
+    def _allocate(self, rows):
+        times = np.zeros((rows, self.capacity))
+        values = np.full((rows, self.capacity, len(METRICS)), np.nan, dtype=np.float32)
+        if self.rows:
+            times[:len(self.times)] = self.times
+            values[:len(self.values)] = self.values
+        self.times = times
+        self.values = values
+        self._times = memoryview(times).cast('B').cast('d')
+        self._values = memoryview(values).cast('B').cast('f')
+
+    def _add_row(self, slot):
+        row = len(self.rows)
+        if row == len(self.times):
+            self._allocate(row + ROW_BLOCK)
+        self.rows[slot] = row
+        self.head.append(0)
+        self.count.append(0)
+        self.written.append(0)
+        return row
+
+    def record(self, slot, audio, rf=np.nan, quality=np.nan, battery=np.nan, timestamp=None):
+        with self.lock:
+            row = self.rows.get(slot)
+            if row is None:
+                row = self._add_row(slot)
+            i = self.head[row]
+            pos = row * self.capacity + i
+            self._times[pos] = timestamp or time.time()
+            base = pos * len(METRICS)
+            values = self._values
+            values[base] = audio
+            values[base + 1] = rf
+            values[base + 2] = quality
+            values[base + 3] = battery
+            self.head[row] = i + 1 if i + 1 < self.capacity else 0
+            if self.count[row] < self.capacity:
+                self.count[row] += 1
+            self.written[row] += 1
+
+    def window(self, slot, seconds, now=None):
+        """Return (times, values) for slot over the last seconds, oldest first.
+
+        values has one row per entry in METRICS.
+        """
+        with self.lock:
+            row = self.rows.get(slot)
+            if row is None:
+                return np.zeros(0), np.zeros((len(METRICS), 0), dtype=np.float32)
+            count = self.count[row]
+            order = (self.head[row] - count + np.arange(count)) % self.capacity
+            times = self.times[row, order]
+            values = self.values[row, order].T
+
+        keep = times >= (now or time.time()) - seconds
+        return times[keep], values[:, keep]
+
+    def since(self, cursors):
+        """Return (times, slots, values) written since cursors, and advance them.
+
+        cursors maps slot -> samples already read and is updated in place.
+        Samples that were overwritten before being read are skipped.
+        """
+        times, slots, values = [], [], []
+        with self.lock:
+            for slot, row in self.rows.items():
+                new = min(self.written[row] - cursors.get(slot, 0), self.capacity)
+                cursors[slot] = self.written[row]
+                if new <= 0:
+                    continue
+                order = (self.head[row] - new + np.arange(new)) % self.capacity
+                times.append(self.times[row, order])
+                slots.append(np.full(new, slot, dtype=np.uint16))
+                values.append(self.values[row, order])
+
+        if not times:
+            return np.zeros(0), np.zeros(0, dtype=np.uint16), np.zeros((0, len(METRICS)), dtype=np.float32)
+        return np.concatenate(times), np.concatenate(slots), np.concatenate(values)
+
+    def summary(self, seconds, slots=None, now=None):
+        """Return {slot: {metric: {'min', 'max', 'mean', 'last'}}} over the last seconds."""
+        with self.lock:
+            rows = dict(self.rows)
+            times = self.times[:len(rows)].copy()
+            values = self.values[:len(rows)].copy()
+            last = (np.array(self.head, dtype=np.int64) - 1) % self.capacity
+
+        if slots is not None:
+            rows = {slot: row for slot, row in rows.items() if slot in slots}
+
+        recent = times >= (now or time.time()) - seconds
+        masked = np.where(recent[:, :, None], values, np.nan)
+        # Metrics a slot doesn't report are all-NaN, which numpy warns about
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            lo = np.nanmin(masked, axis=1)
+            hi = np.nanmax(masked, axis=1)
+            mean = np.nanmean(masked, axis=1)
+        latest = masked[np.arange(len(last)), last]
+
+        out = {}
+        for slot, row in rows.items():
+            if not recent[row].any():
+                continue
+            out[slot] = {
+                metric: {
+                    'min': _number(lo[row, m]), 'max': _number(hi[row, m]),
+                    'mean': _number(mean[row, m]), 'last': _number(latest[row, m])
+                }
+                for m, metric in enumerate(METRICS)
+            }
+        return out
+
+
+def _number(value):
+    if np.isnan(value):
+        return None
+    return round(float(value), 2)
+
+
+store = TelemetryStore()
@@ -0,0 +1,72 @@
+"""Unit tests for the background media index."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import backgrounds
+
+
+class TestBackgroundIndex(unittest.TestCase):
+    """Test cases for BackgroundIndex."""
+
+    def setUp(self):
+        """Set up a backgrounds folder."""
+        self.dir = tempfile.mkdtemp()
+        for name in ['fatai.jpg', 'Dave.GIF', 'choir.mp4', 'notes.txt']:
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write(name)
+        os.mkdir(os.path.join(self.dir, 'old.gif'))
+        patcher = patch('backgrounds.config.gif_dir', self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_file_list(self):
+        """Test files are listed by lowercase extension, directories skipped."""
+        index = backgrounds.BackgroundIndex()
+        self.assertTrue(index.scan())
+        self.assertEqual(index.file_list('.gif'), ['Dave.GIF'])
+        self.assertEqual(index.file_list('.jpg'), ['fatai.jpg'])
+        self.assertEqual(index.file_list('.png'), [])
+        self.assertEqual(index.get('choir.mp4')[:2], ('.mp4', 9))
+
+    def test_version_only_moves_on_change(self):
+        """Test rescanning an unchanged folder keeps the version."""
+        index = backgrounds.BackgroundIndex()
+        index.scan()
+        version = index.version
+        self.assertFalse(index.scan())
+        self.assertEqual(index.version, version)
+
+        os.remove(os.path.join(self.dir, 'fatai.jpg'))
+        self.assertTrue(index.scan())
+        self.assertEqual(index.version, version + 1)
+        self.assertEqual(index.file_list('.jpg'), [])
+
+    def test_file_version_follows_content(self):
+        """Test a replaced file gets a new version token."""
+        index = backgrounds.BackgroundIndex()
+        index.scan()
+        before = index.file_version('fatai.jpg')
+        self.assertIsNotNone(before)
+
+        path = os.path.join(self.dir, 'fatai.jpg')
+        with open(path, 'w') as f:
+            f.write('a new photo')
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1000000))
+        index.scan()
+        self.assertNotEqual(index.file_version('fatai.jpg'), before)
+        self.assertIsNone(index.file_version('missing.jpg'))
+
+    def test_versions_only_for_media(self):
+        """Test only files the front end loads are versioned."""
+        index = backgrounds.BackgroundIndex()
+        index.scan()
+        self.assertEqual(sorted(index.versions), ['Dave.GIF', 'choir.mp4', 'fatai.jpg'])
+
+
+if __name__ == '__main__':
+    unittest.main()
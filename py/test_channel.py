@@ -0,0 +1,111 @@
+"""Unit tests for channel state and update buffers."""
+
+import unittest
+from unittest.mock import patch
+
+import shure
+import mic
+import channel
+import networkdevice
+
+
+class TestUpdateBuffers(unittest.TestCase):
+    """Test cases for the per-slot update buffers."""
+
+    def test_latest_value_per_slot(self):
+        """Test repeated updates for a slot coalesce into one entry."""
+        buf = channel.UpdateBuffer()
+        buf.put(1, 'a')
+        buf.put(2, 'b')
+        buf.put(1, 'c')
+        self.assertEqual(len(buf), 2)
+        self.assertEqual(sorted(buf.drain()), ['b', 'c'])
+        self.assertEqual(buf.drain(), [])
+
+    def test_chart_peak_hold(self):
+        """Test merged chart samples keep the audio peak and latest RF."""
+        buf = channel.ChartBuffer()
+        buf.put(1, {'slot': 1, 'audio_level': 80, 'rf_level': 40})
+        buf.put(1, {'slot': 1, 'audio_level': 20, 'rf_level': 30})
+        self.assertEqual(buf.drain(), [{'slot': 1, 'audio_level': 80, 'rf_level': 30}])
+
+    @patch('channel.time.time')
+    def test_chart_decimation(self, mock_time):
+        """Test a slot ships at most once per interval."""
+        buf = channel.ChartBuffer(interval=.2)
+        mock_time.return_value = 100.0
+        buf.put(1, {'slot': 1, 'audio_level': 10})
+        self.assertEqual(len(buf.drain()), 1)
+
+        buf.put(1, {'slot': 1, 'audio_level': 50})
+        mock_time.return_value = 100.1
+        self.assertEqual(buf.drain(), [])
+
+        buf.put(1, {'slot': 1, 'audio_level': 30})
+        mock_time.return_value = 100.2
+        self.assertEqual(buf.drain(), [{'slot': 1, 'audio_level': 50}])
+
+    def test_batch_publishes_once(self):
+        """Test puts inside a batch are merged and only visible when it ends."""
+        buf = channel.ChartBuffer()
+        buf.put(1, {'slot': 1, 'audio_level': 60})
+        with buf.batch():
+            buf.put(1, {'slot': 1, 'audio_level': 70})
+            buf.put(1, {'slot': 1, 'audio_level': 40})
+            buf.put(2, {'slot': 2, 'audio_level': 5})
+            self.assertEqual(len(buf), 1)
+        self.assertEqual(buf.drain(), [{'slot': 1, 'audio_level': 70}, {'slot': 2, 'audio_level': 5}])
+
+
+class TestChannelState(unittest.TestCase):
+    """Test cases for compact channel state."""
+
+    def setUp(self):
+        rx = networkdevice.ShureNetworkDevice('10.0.0.9', 'ulxd')
+        rx.add_channel_device({'slot': 3, 'channel': 1, 'type': 'ulxd', 'ip': '10.0.0.9'})
+        self.ch = rx.channels[0]
+
+    def test_no_instance_dict(self):
+        """Test channels use slots and share their dispatch tables."""
+        self.assertFalse(hasattr(self.ch, '__dict__'))
+        other = networkdevice.ShureNetworkDevice('10.0.0.10', 'ulxd')
+        other.add_channel_device({'slot': 4, 'channel': 1, 'type': 'ulxd', 'ip': '10.0.0.10'})
+        self.assertIs(other.channels[0].report_dispatch, self.ch.report_dispatch)
+
+    def test_raw_only_in_full_json(self):
+        """Test the raw report mapping is left out of WebSocket updates."""
+        self.ch.parse_raw_ch(['REP', '1', 'BATT_BARS', '004'])
+        self.assertEqual(self.ch.ch_json()['raw'], {'BATT_BARS': '004'})
+        self.assertNotIn('raw', self.ch.ch_json_mini())
+        self.assertEqual(self.ch.ch_json_mini()['battery'], 4)
+
+    def test_chan_name_follows_raw_and_overrides(self):
+        """Test the cached name changes with the raw name and the slot config."""
+        self.ch.set_chan_name_raw('H1_Vocal_Lead')
+        self.assertEqual(self.ch.get_chan_name(), ('H1', 'Vocal Lead'))
+        self.ch.cfg['extended_name'] = 'Sam'
+        self.assertEqual(self.ch.get_chan_name(), ('H1', 'Sam'))
+        self.ch.cfg.pop('extended_name')
+        self.ch.set_chan_name_raw('IEM A Band')
+        self.assertEqual(self.ch.get_chan_name(), ('IEM A', 'Band'))
+
+    def test_status_follows_timeouts(self):
+        """Test peak and battery states expire and push an update."""
+        self.ch.rx.rx_com_status = 'CONNECTED'
+        self.ch.set_battery('4')
+        self.assertEqual(self.ch.tx_state(), 'GOOD')
+        self.ch.set_peak_flag()
+        self.assertEqual(self.ch.tx_state(), 'AUDIO_PEAK')
+        channel.data_updates.drain()
+
+        self.ch.expire(self.ch.peakstamp + mic.PEAK_TIMEOUT)
+        self.assertEqual(self.ch.tx_state(), 'GOOD')
+        self.assertEqual(len(channel.data_updates.drain()), 1)
+        self.ch.expire(self.ch.timestamp + mic.BATTERY_TIMEOUT)
+        self.assertEqual(self.ch.tx_state(), 'TX_COM_ERROR')
+        self.ch.expire(self.ch.timestamp + mic.BATTERY_TIMEOUT + 1)
+        self.assertEqual(len(channel.data_updates.drain()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Unit tests for receiver level conversions."""
+
+import unittest
+
+import conversion
+
+
+IEM_RAW = [0, 10271, 10272, 23727, 23728, 85488, 246259, 246260, 641928,
+           1588743, 1588744, 2157767, 2502969, 2502970, 9999999]
+IEM_LEVELS = [0, 0, 10, 10, 20, 30, 30, 40, 50, 50, 60, 70, 70, 80, 80]
+
+UHFR_RAW = [0, 1, 2, 3, 4, 7, 8, 15, 16, 31, 32, 63, 64, 127, 128, 255]
+UHFR_LEVELS = [0, 13, 25, 25, 38, 38, 50, 50, 63, 63, 75, 75, 88, 88, 100, 100]
+
+
+class TestConversion(unittest.TestCase):
+    """Test cases pinned to the levels the receivers have always shown."""
+
+    def test_iem_audio(self):
+        """Test each IEM threshold boundary."""
+        self.assertEqual([conversion.iem_audio_level(str(raw)) for raw in IEM_RAW], IEM_LEVELS)
+        self.assertEqual(conversion.iem_audio_levels(IEM_RAW).tolist(), IEM_LEVELS)
+
+    def test_uhfr_audio(self):
+        """Test the highest lit bit of the UHF-R bitmap sets the level."""
+        self.assertEqual([conversion.uhfr_audio_level(str(raw)) for raw in UHFR_RAW], UHFR_LEVELS)
+        self.assertEqual(conversion.uhfr_audio_levels(UHFR_RAW).tolist(), UHFR_LEVELS)
+
+    def test_mic_levels_per_type(self):
+        """Test audio and RF scaling for each receiver type."""
+        self.assertEqual(conversion.mic_audio_level('qlxd', '30'), 60)
+        self.assertEqual(conversion.mic_audio_level('axtd', '50'), 30)
+        self.assertEqual(conversion.mic_audio_level('uhfr', '15'), 50)
+        self.assertEqual(conversion.mic_audio_level('slxd', '42'), 42)
+        self.assertEqual(conversion.mic_rf_level('ulxd', '100'), 86)
+        self.assertEqual(conversion.mic_rf_level('uhfr', '20'), 100)
+        self.assertEqual(conversion.mic_rf_level('slxd', '42'), 42)
+
+
+if __name__ == '__main__':
+    unittest.main()
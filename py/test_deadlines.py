@@ -0,0 +1,45 @@
+"""Unit tests for the deadline scheduler."""
+
+import unittest
+
+import deadlines
+
+
+class Item:
+    def __init__(self):
+        self.expired = []
+
+    def expire(self, now):
+        self.expired.append(now)
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    """Test cases for DeadlineScheduler, driven without its thread."""
+
+    def setUp(self):
+        self.scheduler = deadlines.DeadlineScheduler()
+        # Stand in for the thread so schedule() doesn't start one
+        self.scheduler.thread = object()
+
+    def test_earliest_deadline_kept(self):
+        """Test a later deadline waits behind a pending earlier one."""
+        item = Item()
+        self.scheduler.schedule(item, 20)
+        self.scheduler.schedule(item, 10)
+        self.scheduler.schedule(item, 30)
+        self.assertEqual(self.scheduler.pop_expired(9), [])
+        self.assertEqual(self.scheduler.pop_expired(25), [item])
+        self.assertEqual(self.scheduler.pop_expired(100), [])
+        self.assertEqual(self.scheduler.stats()['pending'], 0)
+
+    def test_cancel(self):
+        """Test a cancelled item never expires."""
+        first, second = Item(), Item()
+        self.scheduler.schedule(first, 10)
+        self.scheduler.schedule(second, 10)
+        self.scheduler.cancel(first)
+        self.assertEqual(self.scheduler.pop_expired(10), [second])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the adaptive metering controller."""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import shure
+import metering
+
+
+class FakeReceiver:
+    def __init__(self, slots):
+        self.channels = [SimpleNamespace(slot=s, channel=i + 1, meter_interval=None)
+                         for i, s in enumerate(slots)]
+        self.sent = []
+
+    def set_metering(self, channel, interval):
+        self.sent.append((channel, interval))
+
+
+@patch('metering.config.config_tree', {})
+@patch('metering.time.time')
+class TestMeterController(unittest.TestCase):
+    """Test cases for MeterController."""
+
+    def setUp(self):
+        self.rx = FakeReceiver([1, 2, 3])
+        self.controller = metering.MeterController()
+        self.controller.devices = [self.rx]
+
+    def test_legacy_client_meters_everything(self, mock_time):
+        """Test a client without a view keeps every channel at full rate."""
+        mock_time.return_value = 1000
+        self.controller.set_view('old', None)
+        self.controller.set_view('new', {1})
+        self.assertEqual(self.rx.sent, [(1, .1), (2, .1), (3, .1)])
+
+    def test_unviewed_slots_idle_after_linger(self, mock_time):
+        """Test slots leave full rate only after nobody has viewed them a while."""
+        mock_time.return_value = 1000
+        self.controller.set_view('a', {1, 2})
+        self.controller.set_view('a', {1})
+        self.assertEqual([c.meter_interval for c in self.rx.channels], [.1, .1, 1])
+
+        mock_time.return_value = 1000 + metering.METER_LINGER
+        self.rx.sent = []
+        self.controller.expire()
+        self.assertEqual(self.rx.sent, [(2, 1)])
+
+    def test_idle_interval_zero_stops(self, mock_time):
+        """Test a zero idle interval stops metering once the last display closes."""
+        mock_time.return_value = 1000
+        with patch.dict('metering.config.config_tree', {'meter_idle_interval': 0}):
+            self.controller.set_view('a', {1})
+            mock_time.return_value = 1000 + metering.METER_LINGER
+            self.rx.sent = []
+            self.controller.remove('a')
+        self.assertEqual(self.rx.sent, [(1, 0)])
+        self.assertEqual([c.meter_interval for c in self.rx.channels], [0, 0, 0])
+
+    def test_no_views_keeps_full_rate(self, mock_time):
+        """Test channels stay at full rate until a display sends a view."""
+        mock_time.return_value = 1000
+        with patch.dict('metering.config.config_tree', {'meter_idle_interval': 0}):
+            self.controller.update()
+            self.controller.set_view('old', None)
+            self.controller.remove('old')
+        self.assertEqual([c.meter_interval for c in self.rx.channels], [.1, .1, .1])
+        self.assertEqual(self.rx.sent, [(1, .1), (2, .1), (3, .1)])
+
+    def test_recording_keeps_full_rate(self, mock_time):
+        """Test telemetry recording keeps unviewed channels at full rate."""
+        mock_time.return_value = 1000
+        with patch.dict('metering.config.config_tree', {'record_telemetry': True}):
+            self.controller.set_view('a', {1})
+            mock_time.return_value = 1000 + metering.METER_LINGER
+            self.controller.expire()
+        self.assertEqual([c.meter_interval for c in self.rx.channels], [.1, .1, .1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Unit tests for receiver connection supervision."""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import shure
+import deadlines
+import networkdevice
+import transport
+
+
+class FakeLoop:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback):
+        self.timers.append((delay, callback))
+        return self
+
+    def call_soon_threadsafe(self, callback):
+        pass
+
+    def cancel(self):
+        pass
+
+
+class TestReconnect(unittest.TestCase):
+    """Test cases for watchdog deadlines and reconnect backoff."""
+
+    def setUp(self):
+        self.loop = FakeLoop()
+        transport.start(self.loop, None)
+        self.addCleanup(transport.start, None, None)
+        self.rx = networkdevice.ShureNetworkDevice('10.0.0.9', 'ulxd')
+
+    @patch('networkdevice.random.uniform', return_value=1)
+    def test_backoff_doubles_to_cap(self, _):
+        """Test each failed attempt doubles the delay up to RETRY_MAX."""
+        for _ in range(8):
+            self.rx.schedule_reconnect()
+        self.assertEqual([d for d, _ in self.loop.timers], [1, 2, 4, 8, 16, 30, 30, 30])
+
+        self.rx.set_rx_com_status('CONNECTED')
+        self.rx.schedule_reconnect()
+        self.assertEqual(self.loop.timers[-1][0], 1)
+
+    def test_stopped_device_stays_down(self):
+        """Test a stopped receiver is never reconnected."""
+        self.rx._stop()
+        self.rx.socket_disconnect()
+        self.assertEqual(self.loop.timers, [])
+
+    @patch('networkdevice.time.perf_counter')
+    def test_watchdog_rearms_until_silent(self, mock_clock):
+        """Test recent traffic pushes the deadline out instead of disconnecting."""
+        mock_clock.return_value = 100
+        self.rx.arm_watchdog(5)
+        self.rx.set_rx_com_status('CONNECTED')
+        self.rx.socket_watchdog = 103
+
+        mock_clock.return_value = 105
+        self.rx.check_watchdog()
+        self.assertEqual(self.loop.timers[-1], (3, self.rx.check_watchdog))
+        self.assertEqual(self.rx.rx_com_status, 'CONNECTED')
+
+        # Silent: one keepalive, then give up when it goes unanswered
+        mock_clock.return_value = 108
+        self.rx.check_watchdog()
+        self.assertEqual(self.rx.rx_com_status, 'CONNECTED')
+        mock_clock.return_value = 108 + networkdevice.KEEPALIVE_TIMEOUT
+        self.rx.check_watchdog()
+        self.assertEqual(self.rx.rx_com_status, 'DISCONNECTED')
+        self.assertEqual(self.loop.timers[-1][1], self.rx._socket_connect)
+
+    @patch('networkdevice.time.perf_counter')
+    def test_quiet_receiver_gets_keepalive(self, mock_clock):
+        """Test silence sends a GET first and only an unanswered one disconnects."""
+        self.rx.add_channel_device({'slot': 3, 'channel': 2, 'type': 'ulxd', 'ip': '10.0.0.9'})
+        mock_clock.return_value = 100
+        self.rx.arm_watchdog(5)
+        self.rx.set_rx_com_status('CONNECTED')
+
+        mock_clock.return_value = 105
+        self.rx.check_watchdog()
+        self.assertEqual(self.rx.writeQueue.get_nowait(), '< GET 2 CHAN_NAME >')
+        self.assertEqual(self.loop.timers[-1], (networkdevice.KEEPALIVE_TIMEOUT, self.rx.check_watchdog))
+
+        # Answered: back to waiting out the silence timeout
+        self.rx.socket_watchdog = 106
+        mock_clock.return_value = 107
+        self.rx.check_watchdog()
+        self.assertEqual(self.rx.rx_com_status, 'CONNECTED')
+
+        mock_clock.return_value = 111
+        self.rx.check_watchdog()
+        mock_clock.return_value = 113
+        self.rx.check_watchdog()
+        self.assertEqual(self.rx.rx_com_status, 'DISCONNECTED')
+
+
+class TestLoopCalls(unittest.TestCase):
+    """Test cases for work handed to the I/O loop."""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        transport.start(self.loop, None)
+        self.addCleanup(transport.start, None, None)
+
+    def test_reconfig_cancels_deadlines(self):
+        """Test channels dropped by reconfig leave no timeouts behind."""
+        rx = networkdevice.ShureNetworkDevice('10.0.0.9', 'ulxd')
+        rx.add_channel_device({'slot': 3, 'channel': 1, 'type': 'ulxd', 'ip': '10.0.0.9'})
+        ch = rx.channels[0]
+        ch.set_battery('4')
+        self.assertIn(ch, deadlines.scheduler.due)
+
+        # The order config.reconfig uses
+        rx.disable_metering()
+        rx.stop()
+        del rx.channels[:]
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertTrue(rx.stopped)
+        self.assertNotIn(ch, deadlines.scheduler.due)
+
+    def test_send_before_loop_started(self):
+        """Test a send with no loop yet doesn't block later flushes."""
+        rx = networkdevice.ShureNetworkDevice('10.0.0.9', 'ulxd')
+        transport.start(None, None)
+        rx.send('< GET 1 CHAN_NAME >')
+        self.assertFalse(rx.flush_pending)
+
+        transport.start(self.loop, None)
+        with patch.object(rx, 'flush') as flush:
+            rx.send('< GET 1 CHAN_NAME >')
+            self.loop.run_until_complete(asyncio.sleep(0))
+        flush.assert_called_once_with()
+
+    def test_failed_connects_dont_pile_up_commands(self):
+        """Test each attempt starts from a fresh getAll, not the last one's leftovers."""
+        rx = networkdevice.ShureNetworkDevice('10.0.0.9', 'ulxd')
+        rx.add_channel_device({'slot': 3, 'channel': 1, 'type': 'ulxd', 'ip': '10.0.0.9'})
+        sizes = []
+        with patch('networkdevice.transport.connect', side_effect=OSError), \
+                patch.object(rx, 'schedule_reconnect'):
+            for _ in range(3):
+                rx._socket_connect()
+                self.loop.run_until_complete(asyncio.sleep(0))
+                sizes.append(rx.writeQueue.qsize())
+        rx._cancel_timer()
+        self.assertEqual(len(set(sizes)), 1)
+        self.assertGreater(sizes[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
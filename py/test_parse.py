@@ -0,0 +1,80 @@
+"""Unit tests for receiver message parsing."""
+
+import unittest
+
+import shure
+import channel
+from networkdevice import ShureNetworkDevice
+
+
+class TestParse(unittest.TestCase):
+    """Test cases for the compiled report/sample dispatch."""
+
+    def make_rx(self, rx_type, channels=2):
+        rx = ShureNetworkDevice('10.0.0.1', rx_type)
+        for ch in range(1, channels + 1):
+            rx.add_channel_device({'slot': ch, 'channel': ch})
+        return rx
+
+    def tearDown(self):
+        channel.chart_updates.drain()
+        channel.data_updates.drain()
+
+    def test_report_routed_by_channel(self):
+        """Test reports reach the channel they address."""
+        rx = self.make_rx('ulxd')
+        rx.parse_raw_rx('< REP 2 BATT_BARS 004 >')
+        rx.parse_raw_rx('< REP 2 CHAN_NAME {05 Vox 1    } >')
+        ch = rx.get_device_by_channel(2)
+        self.assertEqual(ch.battery, 4)
+        self.assertEqual(ch.chan_name_raw, '05 Vox 1')
+        self.assertEqual(ch.raw['BATT_BARS'], '004')
+        self.assertEqual(rx.get_device_by_channel(1).battery, 255)
+        self.assertEqual(channel.data_updates.drain(), [ch])
+
+    def test_device_report(self):
+        """Test reports without a channel land in the receiver's raw data."""
+        rx = self.make_rx('ulxd')
+        rx.parse_raw_rx('< REP MODEL {ULXD4Q} >')
+        self.assertEqual(rx.raw['MODEL'], 'ULXD4Q')
+
+    def test_unconfigured_channel_ignored(self):
+        """Test traffic for a channel that has no slot is dropped."""
+        rx = self.make_rx('ulxd', channels=1)
+        rx.parse_raw_rx('< SAMPLE 3 ALL AX 097 037 >')
+        self.assertEqual(channel.chart_updates.drain(), [])
+
+    def test_ulxd_sample(self):
+        """Test a ULX-D meter sample."""
+        rx = self.make_rx('ulxd')
+        rx.parse_raw_rx('< SAMPLE 1 ALL XB 092 030 >')
+        ch = rx.get_device_by_channel(1)
+        self.assertEqual((ch.antenna, ch.rf_level, ch.audio_level), ('XB', 80, 60))
+        self.assertEqual(channel.chart_updates.drain()[0]['slot'], 1)
+
+    def test_axtd_sample(self):
+        """Test an Axient Digital meter sample."""
+        rx = self.make_rx('axtd')
+        rx.parse_raw_rx('< SAMPLE 1 ALL 004 000 005 033 AX 00 046 00 012 >')
+        ch = rx.get_device_by_channel(1)
+        self.assertEqual((ch.antenna, ch.rf_level, ch.audio_level, ch.quality), ('AX', 40, 13, 4))
+
+    def test_uhfr_sample(self):
+        """Test a UHF-R meter sample."""
+        rx = self.make_rx('uhfr')
+        rx.parse_raw_rx('* SAMPLE 1 ALL AB 060 100 3 015 *')
+        ch = rx.get_device_by_channel(1)
+        self.assertEqual((ch.antenna, ch.rf_level, ch.battery, ch.audio_level), ('AB', 50, 3, 50))
+
+    def test_iem_report(self):
+        """Test IEM level reports update levels and the chart."""
+        rx = self.make_rx('p10t')
+        rx.parse_raw_rx('< REP 1 AUDIO_IN_LVL_L 0085488 >')
+        rx.parse_raw_rx('< REP 1 AUDIO_IN_LVL_R 0641928 >')
+        ch = rx.get_device_by_channel(1)
+        self.assertEqual((ch.audio_level_l, ch.audio_level_r), (30, 50))
+        self.assertEqual(len(channel.chart_updates), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Unit tests for receiver query scheduling."""
+
+import unittest
+from unittest.mock import patch
+
+import shure
+import networkdevice
+import queries
+
+
+class TestQueryScheduler(unittest.TestCase):
+    """Test cases for QueryScheduler."""
+
+    def setUp(self):
+        self.rx = networkdevice.ShureNetworkDevice('10.0.0.9', 'ulxd')
+        self.rx.add_channel_device({'slot': 1, 'channel': 1, 'type': 'ulxd', 'ip': '10.0.0.9'})
+        self.rx.rx_com_status = 'CONNECTED'
+        self.sent = []
+        self.rx.send = self.sent.append
+        self.scheduler = queries.QueryScheduler()
+
+    @patch('queries.random.uniform', return_value=0)
+    def test_per_parameter_interval(self, _):
+        """Test names are polled less often than batteries."""
+        for now in range(1000, 1061):
+            self.scheduler.poll([self.rx], now)
+            self.rx.pending_queries.clear()
+        self.assertEqual(self.sent.count('< GET 1 CHAN_NAME >'), 1)
+        self.assertEqual(self.sent.count('< GET 1 BATT_BARS >'), 6)
+
+    @patch('queries.random.uniform', return_value=0)
+    def test_outstanding_query_not_repeated(self, _):
+        """Test an unanswered GET is skipped until a reply or the timeout."""
+        self.scheduler.poll([self.rx], 1000)
+        self.scheduler.poll([self.rx], 1000)
+        self.scheduler.poll([self.rx], 1010)
+        self.assertEqual(self.sent.count('< GET 1 BATT_BARS >'), 1)
+        self.assertEqual(self.scheduler.skipped, 1)
+
+        self.rx.parse_raw_rx('< REP 1 BATT_BARS 004 >')
+        self.rx.parse_raw_rx('< REP 1 CHAN_NAME {Vox 1} >')
+        self.scheduler.poll([self.rx], 1020)
+        self.assertEqual(self.sent.count('< GET 1 BATT_BARS >'), 2)
+        self.scheduler.poll([self.rx], 1060)
+        self.assertEqual(self.scheduler.lost, 1)
+
+    @patch('queries.random.uniform', return_value=0)
+    @patch.dict('queries.config.config_tree', {'query_mode': 'push'})
+    def test_push_mode_polls_only_stale(self, _):
+        """Test recently reported parameters are not polled in push mode."""
+        with patch('channel.time.time', return_value=1000):
+            self.rx.parse_raw_rx('< REP 1 BATT_BARS 004 >')
+        self.scheduler.poll([self.rx], 1000)
+        self.scheduler.poll([self.rx], 1000)
+        self.assertEqual(self.sent, ['< GET 1 CHAN_NAME >'])
+
+        self.scheduler.poll([self.rx], 1060)
+        self.assertEqual(self.sent[-1], '< GET 1 BATT_BARS >')
+        self.assertEqual(self.scheduler.fresh, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Unit tests for the on-disk telemetry recorder."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import recorder
+import telemetry
+
+
+HOUR = 1700000000 // 3600 * 3600
+
+
+class TestRecorder(unittest.TestCase):
+    """Test cases for Recorder segments and queries."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.store = telemetry.TelemetryStore(capacity=64)
+        self.recorder = recorder.Recorder(self.dir, self.store)
+
+    def test_round_trip_across_hours(self):
+        """Test samples come back in order from one segment per hour."""
+        for i in range(10):
+            self.store.record(1, i, 50 + i, timestamp=HOUR - 5 + i)
+            self.store.record(2, 100 + i, timestamp=HOUR - 5 + i)
+        self.assertEqual(self.recorder.flush(), 20)
+        self.assertEqual(self.recorder.flush(), 0)
+        self.assertEqual(len(self.recorder.segments()), 2)
+
+        times, slots, values = self.recorder.read(HOUR - 5, HOUR + 5, {1})
+        self.assertEqual(times.tolist(), [HOUR - 5 + i for i in range(10)])
+        self.assertEqual(set(slots.tolist()), {1})
+        self.assertEqual(values[:, 0].tolist(), list(range(10)))
+        self.assertEqual(len(self.recorder.read(HOUR, HOUR + 1)[0]), 4)
+
+    def test_other_slots_not_decompressed(self):
+        """Test reading one slot only decodes that slot's blocks."""
+        for slot in range(1, 9):
+            self.store.record(slot, slot, timestamp=HOUR + 1)
+        self.recorder.flush()
+        with patch('recorder.decode_block', wraps=recorder.decode_block) as decode:
+            times, slots, values = self.recorder.read(HOUR, HOUR + 10, {5})
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual((slots.tolist(), values[:, 0].tolist()), ([5], [5]))
+
+    def test_envelopes(self):
+        """Test each bucket keeps its min, max and last, per slot."""
+        for i, level in enumerate([10, 50, 30, 0, 20, 40, 60, 55]):
+            self.store.record(3, level, timestamp=HOUR + i)
+        self.store.record(4, 7, 80, timestamp=HOUR + 5)
+        self.recorder.flush()
+
+        out = self.recorder.envelopes([3, 4, 5], HOUR, HOUR + 8, 2)
+        self.assertEqual(out[3]['time'], [HOUR, HOUR + 4])
+        self.assertEqual(out[3]['audio'], {'min': [0, 20], 'max': [50, 60], 'last': [0, 55]})
+        self.assertEqual(out[3]['rf']['max'], [None, None])
+        self.assertEqual(out[4]['time'], [HOUR + 4])
+        self.assertEqual(out[4]['rf'], {'min': [80], 'max': [80], 'last': [80]})
+        self.assertEqual(out[5]['time'], [])
+
+    def test_truncated_block_ignored(self):
+        """Test a block cut short by a crash doesn't break reads."""
+        self.store.record(1, 10, timestamp=HOUR + 1)
+        self.recorder.flush()
+        self.store.record(1, 20, timestamp=HOUR + 2)
+        self.recorder.flush()
+        path = os.path.join(self.dir, self.recorder.segments()[0])
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 3)
+        self.assertEqual(self.recorder.read(HOUR, HOUR + 10)[0].tolist(), [HOUR + 1])
+
+    def test_appends_after_truncated_block(self):
+        """Test blocks written after a crash are read, with or without repair."""
+        self.store.record(1, 10, timestamp=HOUR + 1)
+        self.recorder.flush()
+        self.store.record(1, 20, timestamp=HOUR + 2)
+        self.recorder.flush()
+        path = os.path.join(self.dir, self.recorder.segments()[0])
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 3)
+        self.store.record(1, 30, timestamp=HOUR + 3)
+        self.recorder.flush()
+        self.assertEqual(self.recorder.read(HOUR, HOUR + 10)[0].tolist(), [HOUR + 1, HOUR + 3])
+
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 3)
+        self.recorder.repair()
+        self.store.record(1, 40, timestamp=HOUR + 4)
+        self.recorder.flush()
+        self.assertEqual(self.recorder.read(HOUR, HOUR + 10)[0].tolist(), [HOUR + 1, HOUR + 4])
+
+    @patch('recorder.config.config_tree', {'telemetry_retention_hours': 2})
+    def test_retention(self):
+        """Test segments older than the retention period are removed."""
+        for hours_ago in range(5):
+            self.store.record(1, 0, timestamp=HOUR - hours_ago * 3600)
+            self.recorder.flush()
+        self.recorder.expire(now=HOUR + 60)
+        self.assertEqual(self.recorder.segments(),
+                         [recorder.segment_name(HOUR - h * 3600) for h in (2, 1, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
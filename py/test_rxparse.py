@@ -0,0 +1,86 @@
+"""Unit tests for the sharded receiver parser."""
+
+import unittest
+from unittest.mock import patch
+
+import rxparse
+
+
+class FakeReceiver:
+    def __init__(self, ip):
+        self.ip = ip
+
+
+class FakeProtocol:
+    def __init__(self, name):
+        self.rx = FakeReceiver(name)
+        self.paused = 0
+        self.resumed = 0
+
+    def pause_reading(self):
+        self.paused += 1
+
+    def resume_reading(self):
+        self.resumed += 1
+
+
+class TestParseShard(unittest.TestCase):
+    """Test cases for ParseShard queueing."""
+
+    def test_drops_oldest_samples_only(self):
+        """Test a full shard drops old samples but keeps every report."""
+        shard = rxparse.ParseShard(0)
+        protocol = FakeProtocol('rx')
+        with patch('rxparse.SAMPLE_BACKLOG', 2):
+            shard.put(protocol, ['< SAMPLE 1 ALL AX 0{} 037 >'.format(i) for i in range(4)])
+            shard.put(protocol, ['< REP 1 BATT_BARS 00{} >'.format(i) for i in range(4)])
+
+        lines = [line for _, line, _ in shard.take()]
+        self.assertEqual(lines[:4], ['< REP 1 BATT_BARS 00{} >'.format(i) for i in range(4)])
+        self.assertEqual(lines[4:], ['< SAMPLE 1 ALL AX 02 037 >', '< SAMPLE 1 ALL AX 03 037 >'])
+        self.assertEqual(shard.dropped, 2)
+        self.assertEqual(shard.stats()['max_depth'], 6)
+
+    def test_report_backlog_pauses_reading(self):
+        """Test reads pause once reports back up and resume when taken."""
+        shard = rxparse.ParseShard(0)
+        protocol = FakeProtocol('rx')
+        with patch('rxparse.REPORT_BACKLOG', 3):
+            shard.put(protocol, ['*REP 1 FREQUENCY 0578350*'] * 2)
+            self.assertEqual(protocol.paused, 0)
+            shard.put(protocol, ['*REP 1 FREQUENCY 0578350*'] * 2)
+            shard.put(protocol, ['*REP 1 FREQUENCY 0578350*'])
+            self.assertEqual(protocol.paused, 1)
+
+        with patch('rxparse.transport.call_soon', lambda callback: callback()):
+            self.assertEqual(len(shard.take(limit=4)), 4)
+            self.assertEqual(protocol.resumed, 1)
+            self.assertEqual(len(shard.take(limit=4)), 1)
+
+
+class TestParserPool(unittest.TestCase):
+    """Test cases for assigning receivers to shards."""
+
+    def test_receivers_balanced_and_sticky(self):
+        """Test each receiver keeps one shard and shards fill evenly."""
+        pool = rxparse.ParserPool(workers=2)
+        shards = [pool.shard(rx) for rx in ['a', 'b', 'c', 'd']]
+        self.assertEqual([s.index for s in shards], [0, 1, 0, 1])
+        self.assertIs(pool.shard('c'), shards[2])
+
+    def test_release(self):
+        """Test a released receiver frees its shard and drops its backlog."""
+        pool = rxparse.ParserPool(workers=2)
+        stopped, kept = FakeProtocol('a'), FakeProtocol('b')
+        pool.frames_received(stopped, ['< REP 1 BATT_BARS 004 >'])
+        pool.frames_received(kept, ['< REP 1 BATT_BARS 003 >'])
+        pool.release(stopped.rx)
+        pool.release(stopped.rx)
+
+        self.assertEqual([s.receivers for s in pool.shards], [0, 1])
+        self.assertEqual(pool.stats()[0]['depth'], 0)
+        self.assertIs(pool.shard('c'), pool.shards[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
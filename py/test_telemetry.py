@@ -0,0 +1,48 @@
+"""Unit tests for the in-memory telemetry store."""
+
+import unittest
+
+import telemetry
+
+
+class TestTelemetryStore(unittest.TestCase):
+    """Test cases for TelemetryStore."""
+
+    def test_ring_wraps_oldest_first(self):
+        """Test a full ring keeps the newest samples in time order."""
+        store = telemetry.TelemetryStore(capacity=4)
+        for i in range(6):
+            store.record(1, i, timestamp=100 + i)
+        times, values = store.window(1, 60, now=106)
+        self.assertEqual(times.tolist(), [102, 103, 104, 105])
+        self.assertEqual(values[0].tolist(), [2, 3, 4, 5])
+
+    def test_window_cutoff(self):
+        """Test only samples inside the window are returned."""
+        store = telemetry.TelemetryStore(capacity=8)
+        for i in range(5):
+            store.record(7, 10 * i, 50, timestamp=100 + i)
+        times, values = store.window(7, 2, now=104)
+        self.assertEqual(times.tolist(), [102, 103, 104])
+        self.assertEqual(store.window(8, 2)[0].tolist(), [])
+
+    def test_summary_per_slot(self):
+        """Test min/max/mean/last per slot, with unreported metrics as None."""
+        store = telemetry.TelemetryStore(capacity=8)
+        for slot in range(1, 20):
+            store.record(slot, 0, timestamp=10)
+        store.record(2, 20, 80, timestamp=100)
+        store.record(2, 40, 60, battery=4, timestamp=101)
+        store.record(3, 5, timestamp=101)
+
+        summary = store.summary(5, now=102)
+        self.assertEqual(sorted(summary), [2, 3])
+        self.assertEqual(summary[2]['audio'], {'min': 20, 'max': 40, 'mean': 30, 'last': 40})
+        self.assertEqual(summary[2]['rf']['min'], 60)
+        self.assertEqual(summary[2]['battery'], {'min': 4, 'max': 4, 'mean': 4, 'last': 4})
+        self.assertIsNone(summary[3]['quality']['max'])
+        self.assertEqual(list(store.summary(5, slots={3}, now=102)), [3])
+
+
+if __name__ == '__main__':
+    unittest.main()
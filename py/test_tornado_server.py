@@ -0,0 +1,327 @@
+"""Unit tests for the web server's update encoding and change log."""
+
+import json
+import unittest
+from collections import deque
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from tornado import web
+from tornado.testing import AsyncHTTPTestCase, AsyncTestCase, gen_test
+
+import shure
+import tornado_server
+
+
+class TestChangeLog(unittest.TestCase):
+    """Test cases for the /api/changes change log."""
+
+    def test_latest_change_per_key(self):
+        """Test only the newest change per slot is returned, in order."""
+        log = tornado_server.ChangeLog()
+        log.record('slot', 1, {'slot': 1, 'battery': 5})
+        log.record('group', 2, {'group': 2})
+        log.record('slot', 1, {'slot': 1, 'battery': 4})
+        self.assertEqual(log.since(0), [
+            {'type': 'group', 'data': {'group': 2}},
+            {'type': 'slot', 'data': {'slot': 1, 'battery': 4}},
+        ])
+        self.assertEqual(log.since(2), [{'type': 'slot', 'data': {'slot': 1, 'battery': 4}}])
+        self.assertEqual(log.since(3), [])
+
+    def test_too_far_behind(self):
+        """Test clients older than the log need a snapshot."""
+        log = tornado_server.ChangeLog(size=2)
+        for i in range(5):
+            log.record('slot', i, {'slot': i})
+        self.assertIsNone(log.since(2))
+        self.assertEqual(len(log.since(3)), 2)
+        self.assertIsNone(log.since(6))
+
+    def test_config_change_detected(self):
+        """Test a changed config in the payload is recorded once."""
+        log = tornado_server.ChangeLog()
+        log.check_payload({'config': {'slots': []}, 'plan_of_day': []}, '[]')
+        self.assertEqual(log.seq, 0)
+        log.check_payload({'config': {'slots': [1]}, 'plan_of_day': []}, '[]')
+        log.check_payload({'config': {'slots': [1]}, 'plan_of_day': []}, '[]')
+        self.assertEqual(log.since(0), [{'type': 'config', 'data': {'slots': [1]}}])
+
+
+class TestChanges(unittest.TestCase):
+    """Test cases for /api/changes responses."""
+
+    def setUp(self):
+        snapshot = tornado_server.Snapshot()
+        snapshot.get = lambda: (1, {'config': {'slots': []}, 'receivers': []})
+        self.log = tornado_server.ChangeLog(size=5)
+        for p in (patch('tornado_server.data_snapshot', snapshot),
+                  patch('tornado_server.changelog', self.log),
+                  patch('tornado_server.current_plan_of_day', return_value=([], None))):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_snapshot_carries_current_seq(self):
+        """Test a client sent a snapshot can follow deltas from its seq."""
+        boot = tornado_server.data_snapshot.boot
+        first = json.loads(tornado_server.changes_json(-1, boot))['snapshot']
+        self.assertEqual(first['seq'], 0)
+        for _ in range(10):
+            self.log.record('slot', 1, {'slot': 1})
+
+        snapshot = json.loads(tornado_server.changes_json(first['seq'], boot))['snapshot']
+        self.assertEqual((snapshot['boot'], snapshot['seq']), (boot, 10))
+        self.assertEqual(json.loads(tornado_server.changes_json(10, boot))['changes'], [])
+
+    def test_delta_poll_skips_payload(self):
+        """Test a client that is up to date doesn't cause a payload build."""
+        boot = tornado_server.data_snapshot.boot
+        with patch('tornado_server.data_json') as data_json:
+            tornado_server.changes_json(0, boot)
+        data_json.assert_not_called()
+
+
+class FakeSocket(tornado_server.SocketHandler):
+    """SocketHandler with the connection replaced by unresolved futures."""
+    def __init__(self, chart_format='json'):
+        self.chart_format = chart_format
+        self.inflight = deque()
+        self.backlog = {}
+        self.sent = 0
+        self.dropped = 0
+        self.written = []
+
+    def write_message(self, message, binary=False):
+        future = Future()
+        self.written.append((json.loads(message) if not binary else message, future))
+        return future
+
+
+class TestLaggingClient(unittest.TestCase):
+    """Test cases for holding back WebSocket clients that fall behind."""
+
+    def tick(self, client, slots=(), groups=(), charts=True):
+        state = {}
+        if slots:
+            state['data-update'] = [dict(slot) for slot in slots]
+        if groups:
+            state['group-update'] = [dict(group) for group in groups]
+        chart = [{'slot': 1, 'audio_level': 10, 'rf_level': 80, 'type': 'ulxd', 'timestamp': 100.0}]
+        client.write_tick(tornado_server.TickFrames(chart if charts else [], state))
+
+    def lagging_client(self):
+        client = FakeSocket()
+        for _ in range(tornado_server.WS_HIGH_WATER):
+            self.tick(client)
+        return client
+
+    def test_charts_dropped_past_high_water(self):
+        """Test a client at high water gets nothing new and its charts are dropped."""
+        client = self.lagging_client()
+        self.tick(client)
+        self.tick(client, charts=False)
+        self.assertEqual(len(client.written), tornado_server.WS_HIGH_WATER)
+        self.assertEqual(client.dropped, 1)
+        self.assertEqual(client.backlog, {})
+
+    def test_backlog_merges_by_key(self):
+        """Test held-back slot and group updates keep only the latest of each."""
+        client = self.lagging_client()
+        self.tick(client, slots=[{'slot': 1, 'battery': 5}, {'slot': 2, 'battery': 3}])
+        self.tick(client, slots=[{'slot': 1, 'battery': 4}], groups=[{'group': 7, 'title': 'a'}])
+        self.tick(client, groups=[{'group': 7, 'title': 'b'}])
+        self.assertEqual(client.take_backlog(), {
+            'data-update': [{'slot': 1, 'battery': 4}, {'slot': 2, 'battery': 3}],
+            'group-update': [{'group': 7, 'title': 'b'}],
+        })
+
+    def test_backlog_drains_when_flushed(self):
+        """Test the merged backlog goes out once writes complete."""
+        client = self.lagging_client()
+        self.tick(client, slots=[{'slot': 1, 'battery': 5}])
+        self.tick(client, slots=[{'slot': 1, 'battery': 4}])
+
+        client.written[0][1].set_result(None)
+        self.assertEqual(client.written[-1][0], {'data-update': [{'slot': 1, 'battery': 4}]})
+        self.assertEqual(client.backlog, {})
+        self.assertEqual(len(client.inflight), tornado_server.WS_HIGH_WATER)
+
+        for _, future in list(client.written):
+            if not future.done():
+                future.set_result(None)
+        self.assertEqual(len(client.inflight), 0)
+        self.tick(client)
+        self.assertIn('chart-update', client.written[-1][0])
+
+
+class TestPlanCheck(AsyncTestCase):
+    """Test cases for the periodic plan and config check."""
+
+    def setUp(self):
+        super().setUp()
+        snapshot = tornado_server.Snapshot()
+        snapshot.get = lambda: (1, {'config': {'slots': []}, 'receivers': []})
+        self.log = tornado_server.ChangeLog()
+        self.plan = patch('tornado_server.current_plan_of_day', return_value=([], None))
+        for p in (patch('tornado_server.data_snapshot', snapshot),
+                  patch('tornado_server.changelog', self.log),
+                  patch.object(tornado_server.ChangesHandler, 'last_poll', 0)):
+            p.start()
+            self.addCleanup(p.stop)
+
+    @gen_test
+    def test_skipped_without_displays(self):
+        """Test nothing is fetched while no display is connected or polling."""
+        with self.plan as plan:
+            yield tornado_server.check_plan_changes()
+        plan.assert_not_called()
+
+    @gen_test
+    def test_plan_change_recorded(self):
+        """Test a changed plan reaches the change log for polling displays."""
+        tornado_server.ChangesHandler.last_poll = tornado_server.time.time()
+        with self.plan as plan:
+            yield tornado_server.check_plan_changes()
+            plan.return_value = ([{'plan_id': 1}], None)
+            yield tornado_server.check_plan_changes()
+        self.assertEqual(self.log.since(0), [{'type': 'plan', 'data': [{'plan_id': 1}]}])
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test cases for the cached /data.json snapshot."""
+
+    def setUp(self):
+        self.payload = {'receivers': [], 'config': {'slots': []}}
+        self.snapshot = tornado_server.Snapshot()
+        self.snapshot.current_key = lambda: (self.snapshot.state_version,)
+        p = patch('tornado_server.micboard_payload', side_effect=lambda devices: json.loads(json.dumps(self.payload)))
+        self.build = p.start()
+        self.addCleanup(p.stop)
+
+    def test_version_moves_only_on_change(self):
+        """Test rebuilding an unchanged payload keeps the version."""
+        version, _ = self.snapshot.get()
+        self.snapshot.invalidate()
+        self.assertEqual(self.snapshot.get()[0], version)
+        self.assertEqual(self.build.call_count, 2)
+
+        self.payload['receivers'] = [{'ip': '10.0.0.9'}]
+        self.snapshot.invalidate()
+        version, payload = self.snapshot.get()
+        self.assertEqual(payload['receivers'], [{'ip': '10.0.0.9'}])
+        self.assertEqual(version, 2)
+        self.snapshot.get()
+        self.assertEqual(self.build.call_count, 3)
+
+    def test_body_cached_per_plan(self):
+        """Test the body is encoded once per plan and redone when it changes."""
+        build = lambda plan: (lambda payload: dict(payload, plan_of_day=plan))
+        first = self.snapshot.body('a', build('a'))
+        self.assertIs(self.snapshot.body('a', build('x'))[2], first[2])
+        self.assertEqual(json.loads(self.snapshot.body('b', build('b'))[2])['plan_of_day'], 'b')
+
+
+class TestJsonHandler(AsyncHTTPTestCase):
+    """Test cases for /data.json revalidation."""
+
+    def get_app(self):
+        return web.Application([(r'/data.json', tornado_server.JsonHandler)])
+
+    def setUp(self):
+        super().setUp()
+        self.payload = {'receivers': [], 'config': {'slots': []}}
+        snapshot = tornado_server.Snapshot()
+        snapshot.current_key = lambda: (snapshot.state_version,)
+        for p in (patch('tornado_server.data_snapshot', snapshot),
+                  patch('tornado_server.changelog', tornado_server.ChangeLog()),
+                  patch('tornado_server.current_plan_of_day', return_value=([], None)),
+                  patch('tornado_server.micboard_payload', side_effect=lambda devices: dict(self.payload))):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets a 304 until the payload changes."""
+        response = self.fetch('/data.json')
+        etag = response.headers['ETag']
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body)['seq'], 0)
+
+        response = self.fetch('/data.json', headers={'If-None-Match': etag})
+        self.assertEqual(response.code, 304)
+
+        self.payload['receivers'] = [{'ip': '10.0.0.9'}]
+        tornado_server.data_snapshot.invalidate()
+        response = self.fetch('/data.json', headers={'If-None-Match': etag})
+        self.assertEqual(response.code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+class FakeRecorder:
+    def envelopes(self, slots, start, end, points):
+        return {slot: {'time': [start]} for slot in slots}
+
+
+class TestHistory(AsyncHTTPTestCase):
+    """Test cases for /api/history arguments."""
+
+    def get_app(self):
+        return web.Application([(r'/api/history', tornado_server.HistoryHandler)])
+
+    def setUp(self):
+        super().setUp()
+        p = patch('tornado_server.recorder.recorder', FakeRecorder())
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_envelopes_for_slots(self):
+        """Test several slots are read and returned by number."""
+        response = self.fetch('/api/history?slots=2,1&from=100&to=200')
+        self.assertEqual(json.loads(response.body)['slots'], {'1': {'time': [100]}, '2': {'time': [100]}})
+
+    def test_bad_arguments(self):
+        """Test bad or oversized requests get a 400 with an error."""
+        for query in ('slot=x', 'slot=1&from=abc', 'slot=1&from=200&to=100',
+                      'slot=1&from=0&to=100000', 'from=100&to=200'):
+            response = self.fetch('/api/history?' + query)
+            self.assertEqual(response.code, 400, query)
+            self.assertIn('error', json.loads(response.body))
+
+
+class TestTelemetry(AsyncHTTPTestCase):
+    """Test cases for /api/telemetry arguments."""
+
+    def get_app(self):
+        return web.Application([(r'/api/telemetry', tornado_server.TelemetryHandler)])
+
+    def test_seconds_capped(self):
+        """Test windows longer than the rings are cut to what they hold."""
+        response = self.fetch('/api/telemetry?seconds=99999&slots=1')
+        self.assertEqual(json.loads(response.body)['seconds'], tornado_server.TELEMETRY_MAX_SECONDS)
+
+    def test_bad_arguments(self):
+        """Test bad values get a 400 with an error."""
+        for query in ('seconds=abc', 'slots=1,x', 'seconds=-5', 'seconds=nan'):
+            response = self.fetch('/api/telemetry?' + query)
+            self.assertEqual(response.code, 400, query)
+            self.assertIn('error', json.loads(response.body))
+
+
+class TestChartFrame(unittest.TestCase):
+    """Test cases for the binary chart-update encoding."""
+
+    def test_encode(self):
+        """Test header and entries decode to the original samples."""
+        frame = tornado_server.encode_chart_frame([
+            {'slot': 3, 'audio_level': -12, 'rf_level': 80, 'type': 'axtd', 'timestamp': 100.0},
+            {'slot': 5, 'audio_level_l': 30, 'audio_level_r': 50, 'type': 'p10t', 'timestamp': 100.25},
+        ])
+        header = tornado_server.CHART_HEADER
+        entry = tornado_server.CHART_ENTRY
+        self.assertEqual(len(frame), header.size + 2 * entry.size)
+        self.assertEqual(header.unpack_from(frame, 0), (1, 2, 100.0))
+        self.assertEqual(entry.unpack_from(frame, header.size), (3, 0, -12, 80, 0))
+        self.assertEqual(entry.unpack_from(frame, header.size + entry.size), (5, 1, 30, 50, 250))
+
+
+if __name__ == '__main__':
+    unittest.main()
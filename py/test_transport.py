@@ -0,0 +1,121 @@
+"""Unit tests for receiver stream framing."""
+
+import queue
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import transport
+
+
+class TestFramer(unittest.TestCase):
+    """Test cases for the incremental Framer."""
+
+    def test_complete_frames(self):
+        """Test a read holding several complete frames."""
+        framer = transport.Framer(b'>')
+        frames = framer.feed(b'< REP 1 CHAN_NAME {Vox 1} >< SAMPLE 1 ALL AX 097 037 >')
+        self.assertEqual(frames, ['< REP 1 CHAN_NAME {Vox 1} >', '< SAMPLE 1 ALL AX 097 037 >'])
+        self.assertEqual(framer.buffer, bytearray())
+
+    def test_frame_split_across_reads(self):
+        """Test a frame straddling two reads is delivered once, whole."""
+        framer = transport.Framer(b'>')
+        self.assertEqual(framer.feed(b'< SAMPLE 1 ALL AX 0'), [])
+        self.assertEqual(framer.feed(b'97 037 >< SAMPLE 2'), ['< SAMPLE 1 ALL AX 097 037 >'])
+        self.assertEqual(framer.feed(b' ALL BX 090 030 >'), ['< SAMPLE 2 ALL BX 090 030 >'])
+
+    def test_multibyte_character_split(self):
+        """Test a UTF-8 character split between reads decodes correctly."""
+        data = '< REP 1 CHAN_NAME {Zoë} >'.encode('UTF-8')
+        cut = data.index(b'\xc3') + 1
+        framer = transport.Framer(b'>')
+        self.assertEqual(framer.feed(data[:cut]), [])
+        self.assertEqual(framer.feed(data[cut:]), ['< REP 1 CHAN_NAME {Zoë} >'])
+
+    def test_empty_frames_skipped(self):
+        """Test consecutive delimiters do not produce empty frames."""
+        framer = transport.Framer(b'*')
+        frames = framer.feed(b'* REPORT 1 TX_BAT 4 ** SAMPLE 1 ALL AB 080 100 4 003 *')
+        self.assertEqual(frames, [' REPORT 1 TX_BAT 4 *', ' SAMPLE 1 ALL AB 080 100 4 003 *'])
+
+    def test_flush(self):
+        """Test flush returns the terminated remainder and resets."""
+        framer = transport.Framer(b'*')
+        self.assertEqual(framer.feed(b'* REPORT 1 TX_BAT 4 *\r\n'), [' REPORT 1 TX_BAT 4 *'])
+        self.assertEqual(framer.flush(), ['\r\n*'])
+        self.assertEqual(framer.flush(), [])
+
+    def test_oversized_garbage_dropped(self):
+        """Test the buffer is bounded when no delimiter arrives."""
+        framer = transport.Framer(b'>')
+        framer.feed(b'x' * (transport.MAX_FRAME + 1))
+        self.assertEqual(framer.buffer, bytearray())
+
+
+class FakeTransport:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def sendto(self, data):
+        self.writes.append(data)
+
+    def is_closing(self):
+        return False
+
+
+class FakeLoop:
+    def __init__(self):
+        self.timers = []
+
+    def call_later(self, delay, callback):
+        self.timers.append((delay, callback))
+        return callback
+
+
+class TestCommandWriter(unittest.TestCase):
+    """Test cases for coalesced, rate limited command writes."""
+
+    def setUp(self):
+        self.rx = SimpleNamespace(ip='10.0.0.9', type='ulxd', writeQueue=queue.Queue())
+        self.loop = FakeLoop()
+        transport.start(self.loop, None)
+        self.addCleanup(transport.start, None, None)
+
+    def test_queued_commands_written_once(self):
+        """Test everything queued goes out in a single TCP write."""
+        for i in range(1, 4):
+            self.rx.writeQueue.put('< GET {} CHAN_NAME >'.format(i))
+        protocol = transport.ShureProtocol(self.rx)
+        protocol.connection_made(FakeTransport())
+        self.assertEqual(protocol.transport.writes,
+                         [b'< GET 1 CHAN_NAME >< GET 2 CHAN_NAME >< GET 3 CHAN_NAME >'])
+
+    def test_datagram_per_command(self):
+        """Test UDP receivers still get one command per datagram."""
+        self.rx.writeQueue.put('< GET 1 CHAN_NAME >')
+        self.rx.writeQueue.put('< GET 2 CHAN_NAME >')
+        protocol = transport.ShureDatagramProtocol(self.rx)
+        protocol.connection_made(FakeTransport())
+        self.assertEqual(len(protocol.transport.writes), 2)
+
+    @patch('transport.time.perf_counter', return_value=50)
+    def test_rate_limited(self, _):
+        """Test commands beyond the burst wait for the limiter to refill."""
+        for i in range(5):
+            self.rx.writeQueue.put('< GET 1 BATT_BARS >')
+        protocol = transport.ShureProtocol(self.rx)
+        protocol.limiter = transport.CommandLimiter(rate=10, burst=3)
+        protocol.connection_made(FakeTransport())
+        self.assertEqual(protocol.transport.writes, [b'< GET 1 BATT_BARS >' * 3])
+        self.assertEqual(self.loop.timers, [(.1, protocol.paced_flush)])
+
+        protocol.flush()
+        self.assertEqual(len(self.loop.timers), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
 import json
 import os
+import math
+import time
 import asyncio
 import socket
 import logging
+import zlib
+import struct
 import secrets
+from collections import deque
 from datetime import datetime, timezone
 from urllib.parse import urlencode
 
@@ -17,31 +22,40 @@ import offline
 import planning_center
 import pco_endpoints
 import google_drive
+import backgrounds
+import metering
+import queries
+import deadlines
+import telemetry
+import recorder
 import micboard
 
 
-# https://stackoverflow.com/questions/5899497/checking-file-extension
 def file_list(extension):
-    files = []
-    dir_list = os.listdir(config.gif_dir)
-    # print(fileList)
-    for file in dir_list:
-        if file.lower().endswith(extension):
-            files.append(file)
-    return files
-
-# Its not efficecent to get the IP each time, but for now we'll assume server might have dynamic IP
+    return backgrounds.index.file_list(extension)
+
+# Re-resolved every LOCAL_URL_TTL seconds in case the server has a dynamic IP
+LOCAL_URL_TTL = 60
+_local_url = (0, None)
+
 def localURL():
+    global _local_url
     if 'local_url' in config.config_tree:
         return config.config_tree['local_url']
+
+    resolved_at, url = _local_url
+    if url and time.time() - resolved_at < LOCAL_URL_TTL:
+        return url
+
     try:
         ip = socket.gethostbyname(socket.gethostname())
-        return 'http://{}:{}'.format(ip, config.config_tree['port'])
+        url = 'http://{}:{}'.format(ip, config.config_tree['port'])
     except:
-        return 'https://micboard.io'
-    return 'https://micboard.io'
+        url = 'https://micboard.io'
+    _local_url = (time.time(), url)
+    return url
 
-def micboard_json(network_devices):
+def micboard_payload(network_devices):
     offline_devices = offline.offline_json()
     data = []
     discovered = []
@@ -59,10 +73,107 @@ def micboard_json(network_devices):
     for device in discover.time_filterd_discovered_list():
         discovered.append(device)
 
-    return json.dumps({
+    return {
         'receivers': data, 'url': url, 'gif': gifs, 'jpg': jpgs, 'mp4': mp4s,
+        'bg_versions': backgrounds.index.versions,
         'config': config.config_tree, 'discovered': discovered
-    }, sort_keys=True, indent=4)
+    }
+
+def micboard_json(network_devices):
+    return json.dumps(micboard_payload(network_devices), sort_keys=True, indent=4)
+
+# Slot states derived from the clock (peak hold, battery timeout) are
+# refreshed at least this often even when nothing invalidates the snapshot.
+SNAPSHOT_MAX_AGE = 5
+
+# micboard_payload, rebuilt only when device state, config, backgrounds or
+# the discovered device list change. version only moves when the encoded
+# payload actually differs, so it doubles as the /data.json ETag.
+class Snapshot:
+    def __init__(self):
+        # ETags must not match ones handed out by a previous server process
+        self.boot = secrets.token_hex(4)
+        self.state_version = 0
+        self.version = 0
+        self.key = None
+        self.built_at = 0
+        self.payload = None
+        self.encoded = None
+        self.bodies = {}
+
+    def invalidate(self):
+        self.state_version += 1
+
+    def current_key(self):
+        discovered = tuple(d['ip'] for d in discover.time_filterd_discovered_list())
+        return (self.state_version, config.version, backgrounds.index.version, discovered)
+
+    def get(self):
+        key = self.current_key()
+        if key != self.key or time.time() - self.built_at > SNAPSHOT_MAX_AGE:
+            payload = micboard_payload(shure.NetworkDevices)
+            encoded = json.dumps(payload, sort_keys=True)
+            if encoded != self.encoded:
+                self.payload = json.loads(encoded)
+                self.encoded = encoded
+                self.version += 1
+                self.bodies = {}
+            self.key = key
+            self.built_at = time.time()
+        return self.version, self.payload
+
+    # The /data.json payload and its encoding for the current snapshot and plan_of_day
+    def body(self, plan_json, build):
+        version, payload = self.get()
+        if plan_json not in self.bodies:
+            payload = build(payload)
+            self.bodies = {plan_json: (payload, json.dumps(payload, separators=(',', ':')))}
+        return (version,) + self.bodies[plan_json]
+
+data_snapshot = Snapshot()
+
+# Number of slot/group/config/plan changes kept for /api/changes
+CHANGELOG_SIZE = 2000
+
+class ChangeLog:
+    def __init__(self, size=CHANGELOG_SIZE):
+        self.seq = 0
+        self.entries = deque(maxlen=size)
+        self.plan_json = None
+        self.config = None
+
+    def record(self, kind, key, data):
+        self.seq += 1
+        self.entries.append((self.seq, kind, key, data))
+
+    # Latest change per slot/group/etc. after seq, oldest first. None when
+    # seq is older than the log and the client has to start from a snapshot.
+    def since(self, seq):
+        if seq > self.seq or seq < self.seq - len(self.entries):
+            return None
+
+        latest = {}
+        for entry in reversed(self.entries):
+            if entry[0] <= seq:
+                break
+            latest.setdefault((entry[1], entry[2]), entry)
+
+        return [{'type': kind, 'data': data}
+                for _, kind, _, data in sorted(latest.values(), key=lambda e: e[0])]
+
+    # Plan and config changes are noticed when a /data.json payload is built
+    def check_payload(self, payload, plan_json):
+        if plan_json != self.plan_json:
+            if self.plan_json is not None:
+                self.record('plan', None, payload['plan_of_day'])
+            self.plan_json = plan_json
+
+        if payload['config'] is not self.config:
+            if self.config is not None and payload['config'] != self.config:
+                self.record('config', None, payload['config'])
+            self.config = payload['config']
+
+changelog = ChangeLog()
 
 class IndexHandler(web.RequestHandler):
     def get(self):
@@ -72,119 +183,421 @@ class AboutHandler(web.RequestHandler):
     def get(self):
         self.render(config.app_dir('static/about.html'))
 
+def current_plan_of_day():
+    # Use the new PCO scheduler instead of the old system
+    import pco_scheduler
+    scheduler = pco_scheduler.get_scheduler()
+    current_plan = None
+    if scheduler:
+        # Get all upcoming plans instead of just the current one
+        upcoming_plans = scheduler.get_upcoming_plans()
+        current_plan = scheduler.get_current_plan()
+
+        # Mark which plan is currently active
+        for plan in upcoming_plans:
+            plan['is_live'] = (current_plan and plan['plan_id'] == current_plan['plan_id'])
+            plan['is_manual'] = (scheduler.manual_override_plan and
+                                plan['plan_id'] == scheduler.manual_override_plan['plan_id'])
+            # Merge manual slot overrides if present
+            try:
+                import pco_endpoints
+                ov = pco_endpoints.get_slot_overrides(plan['plan_id'])
+                if ov:
+                    sa = plan.get('slot_assignments') or plan.get('names_by_slot') or {}
+                    sa.update(ov)
+                    plan['slot_assignments'] = sa
+            except Exception as _e:
+                logging.error(f"Override merge failed: {_e}")
+
+        # Return all upcoming plans as an array
+        plan_of_day = upcoming_plans
+    else:
+        plan_of_day = []
+
+    logging.debug(f"JsonHandler: plan_of_day data: {len(plan_of_day)} plans")
+    for plan in plan_of_day:
+        logging.debug(f"JsonHandler: Plan {plan.get('plan_id')} - Service Type: {plan.get('service_type_id')}, Title: {plan.get('title')}, Slot assignments: {plan.get('slot_assignments', {})}")
+    return plan_of_day, current_plan
+
+def plan_of_day_payload(payload, plan_of_day, active_plan):
+    payload = dict(payload)
+    payload['plan_of_day'] = plan_of_day
+
+    # Additionally, reflect the active plan's assignments into config.slots[].extended_name
+    try:
+        if active_plan and payload.get('config') and payload['config'].get('slots'):
+            # Prefer slot_assignments; fallback to names_by_slot if present
+            assignments = active_plan.get('slot_assignments') or active_plan.get('names_by_slot') or {}
+            slots = []
+            for slot_obj in payload['config']['slots']:
+                try:
+                    s = int(slot_obj.get('slot'))
+                except Exception:
+                    slots.append(slot_obj)
+                    continue
+                if s in assignments and assignments[s]:
+                    slot_obj = dict(slot_obj, extended_name=assignments[s])
+                slots.append(slot_obj)
+            payload['config'] = dict(payload['config'], slots=slots)
+    except Exception as _e:
+        logging.error(f"Failed to reflect active plan assignments into config slots: {_e}")
+
+    return payload
+
+# How often plan and config changes are looked for on behalf of /api/changes
+PLAN_CHECK_INTERVAL = 1000
+
+# (etag, body) for /data.json. The cached body outlives many changelog
+# entries, so boot and seq are added per response rather than cached in it.
+def data_json(plan=None):
+    seq = changelog.seq
+    plan_of_day, current_plan = plan or current_plan_of_day()
+    plan_json = json.dumps([plan_of_day, current_plan], sort_keys=True, default=str)
+    version, payload, body = data_snapshot.body(
+        plan_json, lambda payload: plan_of_day_payload(payload, plan_of_day, current_plan))
+    changelog.check_payload(payload, plan_json)
+
+    etag = '"{}-{}-{:08x}"'.format(data_snapshot.boot, version, zlib.crc32(plan_json.encode()))
+    return etag, sync_body(body, seq)
+
+def sync_body(body, seq):
+    return '{{"boot":"{}","seq":{},'.format(data_snapshot.boot, seq) + body[1:]
+
+# Seconds after the last /api/changes poll that HTTP-only displays are
+# assumed to still be watching
+CHANGES_POLL_IDLE = 30
+
+# Delta polls only read the change log; plan and config changes get into it
+# from here rather than by building /data.json on every poll. Fetching the
+# plan can wait on a Planning Center refresh, so it runs off the loop, and
+# only while some display is connected.
+async def check_plan_changes():
+    if not SocketHandler.clients and time.time() - ChangesHandler.last_poll > CHANGES_POLL_IDLE:
+        return
+    try:
+        plan = await ioloop.IOLoop.current().run_in_executor(None, current_plan_of_day)
+        data_json(plan)
+    except Exception as e:
+        logging.error(f"Checking for plan and config changes failed: {e}")
+
+# Changes since seq, or the whole /data.json payload when the client is
+# too far behind or was synced against a previous server process.
+def changes_json(since, boot):
+    changes = None
+    if boot == data_snapshot.boot:
+        changes = changelog.since(since)
+
+    if changes is None:
+        _, body = data_json()
+        return '{"snapshot":' + body + '}'
+    return json.dumps({'boot': data_snapshot.boot, 'seq': changelog.seq, 'changes': changes})
+
 class JsonHandler(web.RequestHandler):
     def get(self):
         self.set_header('Content-Type', 'application/json')
-        # Inject plan_of_day into the json payload
+        # Cached snapshot with plan_of_day, revalidated by ETag
         try:
-            # Use the new PCO scheduler instead of the old system
-            import pco_scheduler
-            scheduler = pco_scheduler.get_scheduler()
-            if scheduler:
-                # Get all upcoming plans instead of just the current one
-                upcoming_plans = scheduler.get_upcoming_plans()
-                current_plan = scheduler.get_current_plan()
-                
-                # Mark which plan is currently active
-                for plan in upcoming_plans:
-                    plan['is_live'] = (current_plan and plan['plan_id'] == current_plan['plan_id'])
-                    plan['is_manual'] = (scheduler.manual_override_plan and 
-                                        plan['plan_id'] == scheduler.manual_override_plan['plan_id'])
-                    # Merge manual slot overrides if present
-                    try:
-                        import pco_endpoints
-                        ov = pco_endpoints.get_slot_overrides(plan['plan_id'])
-                        if ov:
-                            sa = plan.get('slot_assignments') or plan.get('names_by_slot') or {}
-                            sa.update(ov)
-                            plan['slot_assignments'] = sa
-                    except Exception as _e:
-                        logging.error(f"Override merge failed: {_e}")
-                
-                # Return all upcoming plans as an array
-                plan_of_day = upcoming_plans
-            else:
-                plan_of_day = []
-            
-            payload = json.loads(micboard_json(shure.NetworkDevices))
-            logging.info(f"JsonHandler: plan_of_day data: {len(plan_of_day)} plans")
-            if plan_of_day:
-                for plan in plan_of_day:
-                    logging.info(f"JsonHandler: Plan {plan.get('plan_id')} - Service Type: {plan.get('service_type_id')}, Title: {plan.get('title')}, Slot assignments: {plan.get('slot_assignments', {})}")
-            payload['plan_of_day'] = plan_of_day
+            etag, body = data_json()
 
-            # Additionally, reflect the active plan's assignments into config.slots[].extended_name
-            try:
-                active_plan = current_plan
-                # Fallback: if not set above, recompute
-                if 'active_plan' not in locals():
-                    try:
-                        active_plan = scheduler.get_current_plan() if scheduler else None
-                    except Exception:
-                        active_plan = None
-                if active_plan and payload.get('config') and payload['config'].get('slots'):
-                    # Prefer slot_assignments; fallback to names_by_slot if present
-                    assignments = active_plan.get('slot_assignments') or active_plan.get('names_by_slot') or {}
-                    for slot_obj in payload['config']['slots']:
-                        try:
-                            s = int(slot_obj.get('slot'))
-                        except Exception:
-                            continue
-                        if s in assignments and assignments[s]:
-                            slot_obj['extended_name'] = assignments[s]
-            except Exception as _e:
-                logging.error(f"Failed to reflect active plan assignments into config slots: {_e}")
-            self.write(json.dumps(payload, sort_keys=True, indent=4))
+            # Browsers revalidate every poll and get a 304 while nothing changed
+            self.set_header('Cache-Control', 'no-cache')
+            self.set_header('ETag', etag)
+            if self.check_etag_header():
+                self.set_status(304)
+                return
+            self.write(body)
         except Exception as e:
-            logging.error(f"JsonHandler: Error getting plan_of_day: {e}")
-            # Fallback to original if anything goes wrong
+            logging.error(f"JsonHandler: Error building the data.json snapshot: {e}")
+            # Fall back to an uncached payload without plan_of_day
             self.write(micboard_json(shure.NetworkDevices))
 
+class ChangesHandler(web.RequestHandler):
+    last_poll = 0
+
+    def get(self):
+        ChangesHandler.last_poll = time.time()
+        self.set_header('Content-Type', 'application/json')
+        try:
+            since = int(self.get_argument('since', '-1'))
+        except ValueError:
+            since = -1
+        self.write(changes_json(since, self.get_argument('boot', '')))
+
+# Frames written to a client but not yet flushed to its socket. Past this
+# a client stops receiving chart updates and its state updates are merged
+# until it catches up.
+WS_HIGH_WATER = 8
+
+# Compact chart-update frames for clients that connect with ?chart=binary.
+# Little-endian header: version, entry count, base timestamp (s). Each entry:
+# slot, kind (0 mic: audio_level, rf_level / 1 IEM: audio_level_l,
+# audio_level_r), the two levels, and ms since the base timestamp.
+CHART_HEADER = struct.Struct('<BHd')
+CHART_ENTRY = struct.Struct('<HBhhH')
+CHART_VERSION = 1
+
+def encode_frame(out):
+    return escape.utf8(json.dumps(out))
+
+def encode_chart_frame(charts):
+    base = min(c['timestamp'] for c in charts)
+    buf = bytearray(CHART_HEADER.size + CHART_ENTRY.size * len(charts))
+    CHART_HEADER.pack_into(buf, 0, CHART_VERSION, len(charts), base)
+
+    offset = CHART_HEADER.size
+    for c in charts:
+        if 'audio_level_l' in c:
+            kind, a, b = 1, c['audio_level_l'], c['audio_level_r']
+        else:
+            kind, a, b = 0, c['audio_level'], c['rf_level']
+        dt = min(int((c['timestamp'] - base) * 1000), 0xFFFF)
+        CHART_ENTRY.pack_into(buf, offset, c['slot'], kind, a, b, dt)
+        offset += CHART_ENTRY.size
+    return bytes(buf)
+
+# Frames for one ws_dump tick, each encoded at most once on first use
+class TickFrames:
+    def __init__(self, charts, state):
+        self.charts = charts
+        self.state = state
+        self.cache = {}
+
+    def full(self):
+        if 'full' not in self.cache:
+            out = dict(self.state)
+            if self.charts:
+                out['chart-update'] = self.charts
+            self.cache['full'] = encode_frame(out)
+        return self.cache['full']
+
+    def state_only(self):
+        if 'state' not in self.cache:
+            self.cache['state'] = encode_frame(self.state)
+        return self.cache['state']
+
+    def chart_binary(self):
+        if 'binary' not in self.cache:
+            self.cache['binary'] = encode_chart_frame(self.charts)
+        return self.cache['binary']
+
 class SocketHandler(websocket.WebSocketHandler):
     clients = set()
 
     def check_origin(self, origin):
         return True
 
+    def get_compression_options(self):
+        if config.config_tree.get('ws_compression'):
+            return {}
+        return None
+
     def open(self):
+        self.chart_format = self.get_argument('chart', 'json')
+        self.inflight = deque()
+        self.backlog = {}
+        self.sent = 0
+        self.dropped = 0
+        self.connected = time.time()
         self.clients.add(self)
+        # Displays that report what they show get meters only for those slots
+        if not self.get_argument('view', None):
+            metering.controller.set_view(self, None)
 
     def on_close(self):
-        self.clients.remove(self)
+        self.clients.discard(self)
+        metering.controller.remove(self)
+
+    def on_message(self, message):
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+
+        if not isinstance(data, dict):
+            return
+
+        if 'since' in data:
+            try:
+                since = int(data['since'])
+            except (TypeError, ValueError):
+                since = -1
+            self.write_message(changes_json(since, data.get('boot', '')))
+
+        if 'view' in data:
+            try:
+                view = {int(slot) for slot in data['view']}
+            except (TypeError, ValueError):
+                return
+            metering.controller.set_view(self, view)
 
     @classmethod
     def close_all_ws(cls):
-        for c in cls.clients:
+        for c in list(cls.clients):
             c.close()
 
+    def lag(self):
+        if self.inflight:
+            return time.time() - self.inflight[0]
+        return 0
+
+    def stats(self):
+        return {
+            'ip': self.request.remote_ip, 'connected': self.connected, 'chart': self.chart_format,
+            'inflight': len(self.inflight), 'lag': self.lag(),
+            'backlog': sum(len(v) for v in self.backlog.values()),
+            'sent': self.sent, 'dropped': self.dropped
+        }
+
+    def send(self, frame, binary=False):
+        try:
+            future = self.write_message(frame, binary)
+        except websocket.WebSocketClosedError:
+            logging.warning("WS Error")
+            return
+        self.inflight.append(time.time())
+        self.sent += 1
+        future.add_done_callback(self.on_flushed)
+
+    def on_flushed(self, future):
+        self.inflight.popleft()
+        if self.backlog and len(self.inflight) < WS_HIGH_WATER:
+            self.send(encode_frame(self.take_backlog()))
+
+    # State updates for a lagging client are kept, latest per slot/group
+    def queue_state(self, state):
+        for key, entries in state.items():
+            pending = self.backlog.setdefault(key, {})
+            for entry in entries:
+                pending[entry.get('slot', entry.get('group'))] = entry
+
+    def take_backlog(self):
+        out = {key: list(entries.values()) for key, entries in self.backlog.items()}
+        self.backlog = {}
+        return out
+
+    def write_tick(self, frames):
+        if len(self.inflight) >= WS_HIGH_WATER:
+            if frames.charts:
+                self.dropped += 1
+            self.queue_state(frames.state)
+            return
+
+        binary = self.chart_format == 'binary'
+        if self.backlog:
+            self.queue_state(frames.state)
+            out = self.take_backlog()
+            if frames.charts and not binary:
+                out['chart-update'] = frames.charts
+            self.send(encode_frame(out))
+        elif binary:
+            if frames.state:
+                self.send(frames.state_only())
+        else:
+            self.send(frames.full())
+
+        if binary and frames.charts:
+            self.send(frames.chart_binary(), binary=True)
+
     @classmethod
-    def broadcast(cls, data):
-        for c in cls.clients:
-            try:
-                c.write_message(data)
-            except:
-                logging.warning("WS Error")
+    def broadcast(cls, charts, state):
+        frames = TickFrames(charts, state)
+        for c in list(cls.clients):
+            c.write_tick(frames)
 
     @classmethod
     def ws_dump(cls):
-        out = {}
-        if shure.chart_update_list:
-            out['chart-update'] = shure.chart_update_list
+        state = {}
+        charts = shure.chart_updates.drain()
 
-        if shure.data_update_list:
-            out['data-update'] = []
-            for ch in shure.data_update_list:
-                out['data-update'].append(ch.ch_json_mini())
+        devices = shure.data_updates.drain()
+        if devices:
+            state['data-update'] = [ch.ch_json_mini() for ch in devices]
+            for data in state['data-update']:
+                changelog.record('slot', data['slot'], data)
+            data_snapshot.invalidate()
 
         if config.group_update_list:
-            out['group-update'] = config.group_update_list
+            state['group-update'] = list(config.group_update_list)
+            del config.group_update_list[:]
+            for data in state['group-update']:
+                changelog.record('group', data['group'], data)
 
-        if out:
-            data = json.dumps(out)
-            cls.broadcast(data)
-        del shure.chart_update_list[:]
-        del shure.data_update_list[:]
-        del config.group_update_list[:]
+        if charts or state:
+            cls.broadcast(charts, state)
+
+class StatsHandler(web.RequestHandler):
+    def get(self):
+        self.write({
+            'websocket': [c.stats() for c in SocketHandler.clients],
+            'parser': shure.parsers.stats(),
+            'metering': metering.controller.stats(),
+            'queries': queries.scheduler.stats(shure.NetworkDevices),
+            'deadlines': deadlines.scheduler.stats()
+        })
+
+# Longest window /api/telemetry summarizes: what a slot's ring holds at
+# the full meter rate
+TELEMETRY_MAX_SECONDS = telemetry.CAPACITY * metering.METER_ACTIVE
+
+# Recent meter statistics per slot from the in-memory telemetry store
+class TelemetryHandler(web.RequestHandler):
+    def get(self):
+        try:
+            seconds = float(self.get_argument('seconds', 60))
+            slots = self.get_argument('slots', None)
+            if slots:
+                slots = {int(slot) for slot in slots.split(',')}
+        except ValueError:
+            self.set_status(400)
+            self.write({'error': 'seconds and slots must be numbers'})
+            return
+
+        if not math.isfinite(seconds) or seconds <= 0:
+            self.set_status(400)
+            self.write({'error': 'seconds must be positive'})
+            return
+
+        seconds = min(seconds, TELEMETRY_MAX_SECONDS)
+        self.write({'seconds': seconds, 'slots': telemetry.store.summary(seconds, slots)})
+
+# Longest range /api/history will reduce in one request
+HISTORY_MAX_SECONDS = 6 * 3600
+
+# Recorded telemetry for the requested slots, reduced to min/max/last
+# envelopes of at most points buckets
+class HistoryHandler(web.RequestHandler):
+    async def get(self):
+        if not recorder.recorder:
+            self.set_status(404)
+            self.write({'error': 'Telemetry recording is not enabled'})
+            return
+
+        try:
+            end = float(self.get_argument('to', time.time()))
+            start = float(self.get_argument('from', end - 3600))
+            points = max(1, min(int(self.get_argument('points', 500)), 10000))
+            slots = self.get_argument('slots', None) or self.get_argument('slot', '')
+            slots = sorted({int(slot) for slot in slots.split(',')})
+        except ValueError:
+            self.set_status(400)
+            self.write({'error': 'from, to, points and slots must be numbers'})
+            return
+
+        error = None
+        if not (math.isfinite(start) and math.isfinite(end)) or end <= start:
+            error = 'to must be after from'
+        elif end - start > HISTORY_MAX_SECONDS:
+            error = 'Ranges are limited to {} seconds'.format(HISTORY_MAX_SECONDS)
+        if error:
+            self.set_status(400)
+            self.write({'error': error})
+            return
+
+        # Reading segments takes far longer than the loop can be held up
+        # while it is also serving receivers and meters
+        envelopes = await ioloop.IOLoop.current().run_in_executor(
+            None, recorder.recorder.envelopes, slots, start, end, points)
+        self.write({'from': start, 'to': end, 'points': points, 'slots': envelopes})
 
 class SlotHandler(web.RequestHandler):
     def get(self):
@@ -1517,10 +1930,27 @@ class HealthCheckHandler(web.RequestHandler):
             })
 
 # https://stackoverflow.com/questions/12031007/disable-static-file-caching-in-tornado
-class NoCacheHandler(web.StaticFileHandler):
+# Background media is requested as bg/<name>?v=<version>, with the version
+# taken from bg_versions in data.json. A versioned URL never changes content,
+# so browsers keep it for a year; replacing a file changes its URL instead.
+# StaticFileHandler already answers Range requests for seeking in MP4s.
+class BackgroundHandler(web.StaticFileHandler):
+    def compute_etag(self):
+        # The default hashes the whole file and caches it per path for the
+        # life of the process, which goes stale when a file is replaced.
+        name = os.path.basename(self.absolute_path)
+        version = backgrounds.index.file_version(name)
+        if version is None:
+            stat = os.stat(self.absolute_path)
+            version = backgrounds.file_version(stat.st_size, stat.st_mtime_ns)
+        return '"%s"' % version
+
     def set_extra_headers(self, path):
-        # Disable cache
-        self.set_header('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
+        if self.get_query_argument('v', None):
+            self.set_header('Cache-Control', 'public, max-age=31536000, immutable')
+        else:
+            # Unversioned URLs revalidate against the ETag on every use
+            self.set_header('Cache-Control', 'no-cache')
 
 
 def twisted():
@@ -1535,12 +1965,16 @@ def twisted():
         (r'/about', AboutHandler),
         (r'/ws', SocketHandler),
         (r'/data.json', JsonHandler),
+        (r'/api/changes', ChangesHandler),
         (r'/api/group', GroupUpdateHandler),
         (r'/api/slot', SlotHandler),
         (r'/api/config', ConfigHandler),
         (r'/api/integrations', IntegrationsConfigHandler),
         (r'/api/oauth-credentials', OAuthCredentialsHandler),
         (r'/api/health', HealthCheckHandler),
+        (r'/api/stats', StatsHandler),
+        (r'/api/telemetry', TelemetryHandler),
+        (r'/api/history', HistoryHandler),
         (r'/api/pco/service-types', PCOServiceTypesHandler),
         (r'/api/pco/teams', PCOTeamsHandler),
         (r'/api/pco/positions', PCOPositionsHandler),
@@ -1573,12 +2007,19 @@ def twisted():
         (r'/api/config/cleanup', ConfigCleanupHandler),
         # (r'/restart/', MicboardReloadConfigHandler),
         (r'/static/(.*)', web.StaticFileHandler, {'path': config.app_dir('static')}),
-        (r'/bg/(.*)', NoCacheHandler, {'path': config.get_gif_dir()})
+        (r'/bg/(.*)', BackgroundHandler, {'path': config.get_gif_dir()})
     ], cookie_secret=os.environ.get('COOKIE_SECRET', secrets.token_hex(32)))
     # https://github.com/tornadoweb/tornado/issues/2308
     asyncio.set_event_loop(asyncio.new_event_loop())
     app.listen(config.web_port())
+    metering.controller.devices = shure.NetworkDevices
+    shure.SocketService()
+    backgrounds.start_watch_thread()
+    if config.config_tree.get('record_telemetry'):
+        recorder.start_recording()
+    shure.chart_updates.interval = config.config_tree.get('chart_interval', 0) / 1000
     ioloop.PeriodicCallback(SocketHandler.ws_dump, 50).start()
+    ioloop.PeriodicCallback(check_plan_changes, PLAN_CHECK_INTERVAL).start()
     
     # Disable legacy Planning Center background threads; the new scheduler is used instead
     try:
@@ -0,0 +1,214 @@
+import time
+import asyncio
+import logging
+
+
+PORT = 2202
+
+# Keep the kernel/transport buffer small so queued commands wait in
+# writeQueue instead of piling up inside asyncio while a receiver is slow.
+WRITE_BUFFER_HIGH = 16 * 1024
+WRITE_BUFFER_LOW = 4 * 1024
+
+# A receiver that never sends a delimiter is not speaking the protocol
+MAX_FRAME = 64 * 1024
+
+# Commands per second sent to one receiver. The burst covers the full
+# getAll sync on connect, so that goes out in a single write.
+COMMAND_RATE = 100
+COMMAND_BURST = 200
+
+# Set by start() - every transport runs on the same loop as the web server
+loop = None
+frame_sink = None
+
+
+def start(io_loop, sink):
+    global loop, frame_sink
+    loop = io_loop
+    frame_sink = sink
+
+
+# Commands queued before the loop is running are flushed on connection_made.
+# Returns whether the callback was scheduled.
+def call_soon(callback, *args):
+    if not loop:
+        return False
+    loop.call_soon_threadsafe(callback, *args)
+    return True
+
+
+def frame_delimiter(rx):
+    if rx.type == 'uhfr':
+        return b'*'
+    return b'>'
+
+
+class Framer:
+    """Incremental splitter for one connection's byte stream.
+
+    Returns only complete frames (delimiter included) and carries any
+    trailing partial frame into the next feed(). Only the bytes of each
+    complete frame are decoded.
+    """
+    def __init__(self, delimiter):
+        self.delimiter = delimiter
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        buf = self.buffer
+        buf += data
+        frames = []
+        start = 0
+
+        view = memoryview(buf)
+        try:
+            while True:
+                end = buf.find(self.delimiter, start)
+                if end < 0:
+                    break
+                if end > start:
+                    frames.append(str(view[start:end + 1], 'UTF-8', 'replace'))
+                start = end + 1
+        finally:
+            view.release()
+
+        del buf[:start]
+        if len(buf) > MAX_FRAME:
+            logging.warning("Dropping %d bytes without a frame delimiter", len(buf))
+            del buf[:]
+        return frames
+
+    def flush(self):
+        """Return the partial frame left in the buffer, terminated, and reset."""
+        frames = []
+        if self.buffer:
+            frames.append(str(self.buffer, 'UTF-8', 'replace') + self.delimiter.decode())
+            del self.buffer[:]
+        return frames
+
+
+class CommandLimiter:
+    """Token bucket: up to burst commands at once, refilled at rate per second."""
+    def __init__(self, rate=COMMAND_RATE, burst=COMMAND_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.perf_counter()
+
+    def take(self, wanted):
+        now = time.perf_counter()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        granted = min(wanted, int(self.tokens))
+        self.tokens -= granted
+        return granted
+
+    # Seconds until the next command may be sent
+    def delay(self):
+        return max(0, (1 - self.tokens) / self.rate)
+
+
+class ShureProtocol(asyncio.Protocol):
+    def __init__(self, rx):
+        self.rx = rx
+        self.transport = None
+        self.paused = False
+        self.framer = Framer(frame_delimiter(rx))
+        self.limiter = CommandLimiter()
+        self.flush_timer = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if hasattr(transport, 'set_write_buffer_limits'):
+            transport.set_write_buffer_limits(WRITE_BUFFER_HIGH, WRITE_BUFFER_LOW)
+        self.flush()
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self.rx.connection_lost(self)
+
+    def data_received(self, data):
+        self.frames_received(self.framer.feed(data))
+
+    def frames_received(self, frames):
+        if frames:
+            frame_sink(self, frames)
+
+        self.rx.socket_watchdog = time.perf_counter()
+        self.rx.set_rx_com_status('CONNECTED')
+
+    # Back-pressure from the parser when it falls behind on reports
+    def pause_reading(self):
+        if self.transport and not self.transport.is_closing():
+            self.transport.pause_reading()
+
+    def resume_reading(self):
+        if self.transport and not self.transport.is_closing():
+            self.transport.resume_reading()
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        self.flush()
+
+    # Everything queued that the limiter allows goes out in one write; the
+    # rest is sent when the limiter refills.
+    def flush(self):
+        if self.flush_timer or self.paused or not self.transport or self.transport.is_closing():
+            return
+
+        commands = []
+        for _ in range(self.limiter.take(self.rx.writeQueue.qsize())):
+            commands.append(self.rx.writeQueue.get_nowait())
+
+        if commands:
+            logging.debug("write: %s data: %s", self.rx.ip, commands)
+            try:
+                self.write_commands(commands)
+            except Exception:
+                logging.warning("TX ERROR IP: %s String: %s", self.rx.ip, commands)
+
+        if not self.rx.writeQueue.empty():
+            self.flush_timer = loop.call_later(self.limiter.delay(), self.paced_flush)
+
+    def paced_flush(self):
+        self.flush_timer = None
+        self.flush()
+
+    def write_commands(self, commands):
+        self.transport.write(''.join(commands).encode('UTF-8'))
+
+    def close(self):
+        if self.flush_timer:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if self.transport:
+            self.transport.close()
+
+
+class ShureDatagramProtocol(ShureProtocol, asyncio.DatagramProtocol):
+    # A datagram is always a complete message, so nothing is carried over
+    def datagram_received(self, data, addr):
+        self.frames_received(self.framer.feed(data) + self.framer.flush())
+
+    def error_received(self, exc):
+        logging.debug("UDP error from %s: %s", self.rx.ip, exc)
+
+    # Receivers expect one command per datagram
+    def write_commands(self, commands):
+        for string in commands:
+            self.transport.sendto(string.encode('UTF-8'))
+
+
+# Raises OSError, or asyncio.TimeoutError if the receiver doesn't answer in time
+async def connect(rx, timeout=None):
+    if rx.protocol_type == 'TCP':
+        connection = loop.create_connection(lambda: ShureProtocol(rx), rx.ip, PORT)
+    else:
+        connection = loop.create_datagram_endpoint(lambda: ShureDatagramProtocol(rx),
+                                                   remote_addr=(rx.ip, PORT))
+    _, protocol = await asyncio.wait_for(connection, timeout)
+    return protocol